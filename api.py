@@ -1,32 +1,49 @@
+import time
+
+# Start of api.py's import, for the startup timings (taken before the heavy imports)
+PROCESS_START = time.perf_counter()
+
+from dotenv import load_dotenv
+
+# Before the project's imports: modules read their settings from the environment
+load_dotenv()
+
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi import WebSocket, WebSocketDisconnect
 from contextlib import asynccontextmanager
 import uvicorn
 import asyncio
-import base64
-from recallai import RecallAI
-from pyngrok import ngrok
-from openai import OpenAIRealtime
-from pydub import AudioSegment
-import io
-import time
-from dotenv import load_dotenv
+import metrics
+import sqlite3
+from recallai import RecallAI, close_http_client
+from openai import OpenAIRealtimePool
+from sessions import MeetingSession, SessionLimitError, SessionManager
+from streaming import ASSISTANT_SAMPLE_RATE
+from encoder import Mp3Encoder, resample
+from assets import clip_b64, silence_b64
+from workers import shutdown_workers
+from transcripts import close_transcript_store, get_transcript_store
+from knowledge import get_knowledge_base
+from logs import get_logger
 
-load_dotenv()
+log = get_logger("api")
 
 # Global variables
-recallai = None
-oai_realtime_ws = None
+sessions = None
+realtime_pool = None
 http_tunnel = None
+pending_closes = {}  # token -> teardown waiting for Recall to reconnect
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    global recallai, oai_realtime_ws, http_tunnel
+def open_tunnel():
+    """
+    Open the ngrok tunnel (blocking; run it in a thread) and publish its URL
+    as WEBHOOK_URL. pyngrok is only imported when a tunnel is needed.
+    """
+    global http_tunnel
+    from pyngrok import ngrok
 
-    # Set up ngrok tunnel and webhook URL
     try:
         # Kill any existing ngrok processes
         try:
@@ -36,138 +53,246 @@ async def lifespan(app: FastAPI):
             pass
         http_tunnel = ngrok.connect(8080)
         webhook_url = http_tunnel.public_url
-        print(f"Webhook URL: {webhook_url}")
+        log.info("webhook_url", url=webhook_url)
         os.environ["WEBHOOK_URL"] = webhook_url
     except Exception as e:
-        print(f"Error setting up ngrok tunnel: {e}")
-        print("Make sure no other ngrok tunnels are running")
+        log.error("ngrok_failed", error=e, hint="Make sure no other ngrok tunnels are running")
         raise
 
-    # Initialize services
-    recallai = RecallAI()
-    oai_realtime_ws = OpenAIRealtime()
+
+def close_tunnel():
+    from pyngrok import ngrok
+
+    ngrok.disconnect(http_tunnel.public_url)
+
+
+def prepare_assets():
+    """
+    Warm everything a session needs on its first use: the bot's join silence,
+    the filler clip, the knowledge base and the transcript store.
+    """
+    global filler_clip
+    silence_b64(duration_ms=300, sample_rate=16000)
+    if FILLER_AUDIO:
+        filler_clip = clip_b64(FILLER_AUDIO, mp3_encoder)
+    get_knowledge_base()
+    get_transcript_store()
+
+
+async def timed(name, step):
+    # Await a coroutine as one named startup phase
+    with metrics.startup_phase(name):
+        return await step
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: independent steps run concurrently; the bot is created as
+    # soon as the webhook URL and its assets are ready
+    global sessions, realtime_pool
+    imports = time.perf_counter() - PROCESS_START
+    log.info("startup_phase", phase="imports", seconds=round(imports, 3))
+    metrics.STARTUP_SECONDS.labels("imports").set(imports)
+
+    realtime_pool = OpenAIRealtimePool()
+    sessions = SessionManager()
+    metrics.track_sessions(sessions)
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
+
+    # Set up ngrok tunnel and webhook URL, unless a fixed one is configured
+    # (deployed environments set WEBHOOK_URL to their public URL)
+    if os.getenv("WEBHOOK_URL"):
+        log.info("webhook_url", url=os.environ["WEBHOOK_URL"])
+        tunnel = None
+    else:
+        tunnel = asyncio.create_task(timed("tunnel", asyncio.to_thread(open_tunnel)))
+    assets = asyncio.create_task(timed("assets", asyncio.to_thread(prepare_assets)))
+    # Warm OpenAI connections in the background; the bot does not wait for them
+    pool_warmup = asyncio.create_task(timed("openai_pool", realtime_pool.start()))
+
+    await asyncio.gather(*(step for step in (tunnel, assets) if step is not None))
 
     # Create the bot
     meeting_url = os.getenv("ZOOM_MEETING_URL")
     if meeting_url:
-        recallai.create(meeting_url)
-        print(f"Recall.ai Bot ID: {recallai.id}")
+        session = await timed(
+            "create_bot", sessions.open(lambda: create_session(meeting_url))
+        )
+        log.info("bot_created", bot_id=session.bot_id)
     else:
-        print("Warning: ZOOM_MEETING_URL not set")
+        log.warning("no_meeting_url", hint="ZOOM_MEETING_URL not set")
+    await pool_warmup
+    total = time.perf_counter() - PROCESS_START
+    metrics.STARTUP_SECONDS.labels("total").set(total)
+    log.info("startup_complete", seconds=round(total, 3))
 
     yield
 
     # Shutdown
-    if recallai and recallai.id:
-        recallai.remove()
+    lag_monitor.cancel()
+    for pending in pending_closes.values():
+        pending.cancel()  # close_all() tears those sessions down now
+    pending_closes.clear()
+    await sessions.close_all()
+    await realtime_pool.close()
+    await close_http_client()
+    shutdown_workers()
+    close_transcript_store()
     if http_tunnel:
-        ngrok.disconnect(http_tunnel.public_url)
+        close_tunnel()
 
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
 
-# Global variable to store audio data
-audio_buffer = ""
+# In-process MP3 encoder for the assistant's voice, downsampled to 11025 Hz
+mp3_encoder = Mp3Encoder(sample_rate=11025)
 
+# Optional WAV clip ("one moment...") played while a slow answer is generating
+FILLER_AUDIO = os.getenv("FILLER_AUDIO")
+filler_clip = None
 
-def convert_audio_to_mp3(audio_data):
+
+def pcm16_to_mp3(audio_bytes):
+    """
+    Convert raw 24 kHz PCM16 (OpenAI's pcm16 output) to base64-encoded MP3
+    at 11025 Hz, at the original speed and pitch.
+    """
+    # The original pydub chain labelled the audio 48 kHz and played it at half
+    # speed, which cancels out: it is one 24 kHz -> 11025 Hz resample
+    samples = resample(audio_bytes, ASSISTANT_SAMPLE_RATE, mp3_encoder.sample_rate)
+
+    # Export the audio as base64-encoded MP3
+    return mp3_encoder.encode_b64(samples)
+
+
+def encode_segment(pcm):
     """
-    Convert base64-encoded PCM16 audio to MP3 format with lower pitch and slower speed.
+    Encode one PCM16 segment of the assistant's answer for playback.
+    Runs on an audio worker, never on the event loop.
     """
-    # Decode the base64-encoded PCM16 audio
-    audio_bytes = base64.b64decode(audio_data)
+    start = time.time()
+    # Live answers almost never repeat: encode directly and leave the asset
+    # cache to the canned audio (silence, filler) it is sized for
+    converted_audio = pcm16_to_mp3(pcm)
+    end = time.time()
+    log.debug("segment_encoded", seconds=round(end - start, 4), chars=len(converted_audio))
+    return converted_audio
 
-    # Convert from PCM16 to MP3 with appropriate settings
-    audio = AudioSegment.from_file(
-        io.BytesIO(audio_bytes),
-        format="raw",
-        frame_rate=48000,
-        channels=1,
-        sample_width=2,
+
+async def create_session(meeting_url, bot_name="Neil"):
+    """
+    Create a bot for the meeting with its own session and audio websocket path.
+    """
+    session = MeetingSession(
+        RecallAI(), encode=encode_segment, pool=realtime_pool, filler=filler_clip
     )
-    audio = audio.set_frame_rate(16000).set_channels(
-        1
-    )  # Adjust frame rate to slow down audio
-    audio = audio._spawn(
-        audio.raw_data, overrides={"frame_rate": int(audio.frame_rate * 0.5)}
-    )  # Further slow down and lower pitch
-    audio = audio.set_frame_rate(
-        11025
-    )  # Set final frame rate to make it even slower and lower pitch
-
-    # Export the audio as MP3
-    mp3_buffer = io.BytesIO()
-    audio.export(mp3_buffer, format="mp3")
-
-    # Get base64-encoded MP3 data
-    mp3_data = base64.b64encode(mp3_buffer.getvalue()).decode("utf-8")
-
-    return mp3_data
-
-
-async def realtime_message_handler(message):
-    """
-    Handle real-time messages from the OpenAI WebSocket.
-    """
-    global audio_buffer
-    print()
-    if message.get("type") == "response.audio.delta":
-        content = message.get("delta", None)  # str of base64 audio data
-        if content is not None:
-            audio_buffer += content
-    elif message.get("type") == "response.audio.done":
-        print(
-            f"Sending audio to bot {recallai.id}. Base64 audio size: {len(audio_buffer)} characters"
-        )
+    await session.recall.create(
+        meeting_url, bot_name=bot_name, audio_path=f"/audio/{session.token}"
+    )
+    if session.transcripts is not None:
+        session.transcripts.add_meeting(session.bot_id, meeting_url=meeting_url)
+    return session
 
-        start = time.time()
-        converted_audio = convert_audio_to_mp3(audio_buffer)
-        end = time.time()
-        print(f"Time taken to convert audio: {end - start} seconds")
 
-        result = recallai.output_audio(converted_audio)
-        print(f"Result from output_audio: {result}")
-        audio_buffer = ""
+@app.post("/bots")
+async def add_bot(meeting_url: str, bot_name: str = "Neil"):
+    """
+    Send another bot to a meeting, served by this process.
+    """
+    try:
+        session = await sessions.open(lambda: create_session(meeting_url, bot_name))
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"bot_id": session.bot_id}
 
 
-@app.websocket("/audio")
-async def audio_endpoint(websocket: WebSocket):
+@app.delete("/bots/{bot_id}")
+async def remove_bot(bot_id: str):
     """
-    WebSocket endpoint for handling audio data.
+    Take a bot out of its meeting and tear its session down.
     """
-    await websocket.accept()
+    if sessions.get(bot_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown bot")
+    await sessions.close(bot_id)
+    return {"bot_id": bot_id}
 
-    if not oai_realtime_ws.ws or not oai_realtime_ws.ws.open:
-        print("Realtime WebSocket not connected, connecting...")
-        await oai_realtime_ws.connect()
 
-    # Create a partial function with the websocket parameter
-    def handler(message):
-        return realtime_message_handler(message)
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Prometheus metrics: per-turn latency, encode and Recall POST timings,
+    ingress frame rate, queue depths and event-loop lag.
+    """
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
-    # Start receiving messages from RealtimeWebSocket in the background
-    receive_task = asyncio.create_task(oai_realtime_ws.receive_messages(handler))
 
+@app.get("/transcripts/search")
+async def search_transcripts(q: str, bot_id: str = None, limit: int = 20):
+    """
+    Full-text search over the transcripts of every meeting this deployment
+    has served (FTS5 query syntax).
+    """
+    store = get_transcript_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Transcripts are disabled")
     try:
+        return await asyncio.to_thread(store.search, q, limit, bot_id)
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Bad search query: {e}")
+
+
+@app.websocket("/audio/{token}")
+async def audio_endpoint(websocket: WebSocket, token: str):
+    """
+    WebSocket endpoint for handling one bot's audio data.
+    """
+    session = sessions.by_token(token)
+    if session is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+
+    # Recall came back within the grace period: keep the session
+    pending = pending_closes.pop(token, None)
+    if pending is not None:
+        pending.cancel()
+        log.info("recall_reconnected", bot_id=session.bot_id)
+
+    connected = False
+    try:
+        # Connect this bot's realtime session and start playing answers back
+        await session.connect()
+        connected = True
         while True:
             message = await websocket.receive()
             if message["type"] == "websocket.disconnect":
                 break
             elif message["type"] == "websocket.receive":
-                if "bytes" in message:
-                    audio_data = message["bytes"]
-                    base64_audio = base64.b64encode(audio_data).decode("utf-8")
-                    await oai_realtime_ws.send_audio(base64_audio)
+                if message.get("bytes") is not None:
+                    session.push_audio(message["bytes"])
+                elif message.get("text") is not None:
+                    session.push_event(message["text"])
     except WebSocketDisconnect:
-        print("WebSocket disconnected")
+        log.info("recall_disconnected", bot_id=session.bot_id)
     finally:
-        print("WebSocket connection closed")
-        receive_task.cancel()
-        try:
-            await receive_task
-        except asyncio.CancelledError:
-            pass
+        log.info("recall_stream_closed", bot_id=session.bot_id)
+        grace = float(os.getenv("RECALL_RECONNECT_GRACE_S", "10"))
+        if connected and grace > 0:
+            # A dropped stream may be transient: wait for Recall to reconnect
+            pending_closes[token] = asyncio.create_task(close_after_grace(session, grace))
+        else:
+            await sessions.close(session.bot_id)
+
+
+async def close_after_grace(session, grace):
+    # Tear the session down (and take the bot out of the call) if its audio
+    # stream has not come back within ``grace`` seconds
+    await asyncio.sleep(grace)
+    pending_closes.pop(session.token, None)
+    log.info("recall_stream_lost", bot_id=session.bot_id, grace_s=grace)
+    await sessions.close(session.bot_id)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 # requirements:
-#   fastapi==0.115.*  uvicorn[standard]==0.30.*  websockets==12.*  httpx==0.27.*
-#   python-dotenv==1.*  pydub==0.25.*  ffmpeg must be installed on the system
+#   fastapi==0.115.*  uvicorn[standard]==0.30.*  websockets>=12,<14  httpx==0.27.*
+#   python-dotenv==1.*  pydub==0.25.*  numpy  lameenc (optional; otherwise ffmpeg must be installed on the system)
 #
 # .env:
 #   RECALL_API_KEY=...
@@ -12,104 +12,331 @@ import base64
 import json
 import os
 import uuid
-from io import BytesIO
 
-import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from pydub import AudioSegment
-import websockets
 
+# Before the project's imports: modules read their settings from the environment
 load_dotenv()
 
+from fastapi import FastAPI, HTTPException, Response, WebSocket, WebSocketDisconnect
+import websockets
+
+from bargein import BargeInController
+from capture import CaptureWriter
+from chat import ChatRelay, chat_enabled, chat_to, modalities
+from context import ContextCompactor, compaction_enabled
+from codec import append_message, dumps, parse_server_event, recall_audio_b64
+from dsp import IngressCodec
+import metrics
+from encoder import Mp3Encoder
+from ingress import IngressQueue
+from knowledge import TOOL as KNOWLEDGE_TOOL, KnowledgeTool
+from logs import get_logger
+from metrics import TurnTracer, ingress_frame
+from recallai import RecallAI, close_http_client, request as recall_request
+from sessions import SessionLimitError, SessionManager
+from speakers import ParticipantMap, SpeakerRouter, raw_audio_config, realtime_events, routing_enabled
+from playback import PlaybackScheduler
+from streaming import ASSISTANT_SAMPLE_RATE, StreamingEgress
+from vad import VoiceActivityGate, gate_enabled
+from wake import WakeGate, wake_gate_enabled
+from transcripts import close_transcript_store, get_transcript_store
+from workers import get_workers, shutdown_workers
+
+log = get_logger("app")
+
 RECALL_API_KEY = os.environ["RECALL_API_KEY"]
 OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 ZOOM_MEETING_URL = os.environ["ZOOM_MEETING_URL"]
 
-# --- OpenAI Realtime client (single connection) --------------------------------
+# --- OpenAI Realtime client (one connection per bot) ---------------------------
+
+# Server VAD settings; the local VAD gate mirrors prefix padding and silence.
+TURN_DETECTION = {
+    "type": "server_vad",
+    "threshold": 0.5,
+    "prefix_padding_ms": 300,
+    "silence_duration_ms": 200,
+    "create_response": True,
+}
 
 
 class OpenAIRealtimeClient:
     def __init__(self):
         self.ws = None
         self.lock = asyncio.Lock()
-        self.audio_buffer = bytearray()
         self.connected = asyncio.Event()
+        # Recall connects to /recall/{token}; bot_id is known once the bot exists.
+        self.token = uuid.uuid4().hex
+        self.bot_id = None
+        self.closing = False
+        self._reader_task = None
+        self._tasks = set()  # Background work (reconnects), kept until it finishes
+        # Meeting audio is queued and sent in coalesced appends by a sender task
+        self.ingress = IngressQueue(send=self._send_append)
+        # 16 kHz meeting audio -> the input_audio_format declared in session.update
+        self.wire = IngressCodec()
+        # Participants, fetched at most once per PARTICIPANT_TTL and kept current from events
+        self.participants = ParticipantMap(fetch=lambda: recall_participants(self.bot_id))
+        # With SPEAKER_ALLOWLIST, only those speakers' own streams reach OpenAI
+        self.speakers = SpeakerRouter(self.participants) if routing_enabled() else None
+        # Assistant audio is segmented and played while it is still streaming in
+        self.tracer = TurnTracer()
+        # Resample/encode jobs go to the shared worker pool, with per-bot backpressure
+        self.jobs = get_workers().jobs()
+        # Knowledge-base lookups for the model, cached per meeting (None without an index)
+        self.knowledge = KnowledgeTool.for_meeting(send_event=self._send_event)
+        # Searchable transcript of the meeting (None when TRANSCRIPT_DB is empty)
+        self.transcripts = get_transcript_store()
+        self._item_speakers = {}  # user item id -> floor holder when the item was committed
+        # Replayable capture of meeting audio and OpenAI events (when CAPTURE_DIR is set)
+        self.capture = CaptureWriter.for_session(self.token)
+        # Suggestions posted to the meeting chat while they are generated (OUTPUT_MODE)
+        self.chat = ChatRelay(send=self._send_chat) if chat_enabled() else None
+        # With WAKE_GATE, response.create is sent only after the wake phrase
+        self.wake = WakeGate() if wake_gate_enabled() else None
+        # Long meetings: old items are replaced by a rolling summary (CONTEXT_MAX_TOKENS)
+        self.context = (
+            ContextCompactor(send_event=self._send_event) if compaction_enabled() else None
+        )
+        self.egress = StreamingEgress(encode=self._encode, send=self.speak_back)
+        # Segments are uploaded in order, each just before the previous one ends
+        self.playback = PlaybackScheduler(post=self._post_audio)
+        # Participants can talk over the bot: playback stops on speech_started
+        self.barge_in = BargeInController(
+            self.egress, stop_audio=self._stop_audio, send_event=self._send_event
+        )
+        # Silent meeting audio is dropped locally instead of being billed upstream
+        self.vad = (
+            VoiceActivityGate.for_turn_detection(TURN_DETECTION)
+            if gate_enabled()
+            else None
+        )
 
     async def connect(self):
         # Official websocket endpoint for realtime models (WebSocket mode).
         # Model choices evolve; "gpt-realtime" or "gpt-4o-realtime-preview" are common.
         # See docs for the latest naming.  [oai_citation:3‡Microsoft Learn](https://learn.microsoft.com/en-us/azure/ai-foundry/openai/realtime-audio-quickstart?utm_source=chatgpt.com)
-        url = "wss://api.openai.com/v1/realtime?model=gpt-realtime"
-        self.ws = await websockets.connect(
-            url, additional_headers={"Authorization": f"Bearer {OPENAI_API_KEY}"}
+        url = os.getenv(
+            "OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime?model=gpt-realtime"
         )
-        # Configure the session: pcm16 IO, server VAD, a voice name.
-        await self.ws.send(
-            json.dumps(
-                {
-                    "type": "session.update",
-                    "session": {
-                        "voice": "alloy",
-                        "input_audio_format": "pcm16",
-                        "turn_detection": {
-                            "type": "server_vad",
-                            "threshold": 0.5,
-                            "prefix_padding_ms": 300,
-                            "silence_duration_ms": 200,
-                            "create_response": True,
-                        },
-                    },
-                }
-            )
+        reconnecting = self.ws is not None
+        # websockets <14 (pinned in requirements.txt): extra_headers, as in openai.py
+        self.ws = await websockets.connect(
+            url, extra_headers={"Authorization": f"Bearer {OPENAI_API_KEY}"}
         )
+        # Configure the session: wire format from dsp.IngressCodec, server VAD, a voice name.
+        session = {
+            "voice": "alloy",
+            "modalities": modalities(),
+            "input_audio_format": self.wire.input_audio_format,
+            "turn_detection": TURN_DETECTION,
+        }
+        if self.wake is not None:
+            # No response per turn; _reader asks for one when the wake phrase is heard.
+            session["turn_detection"] = {**TURN_DETECTION, "create_response": False}
+        if self.transcripts is not None or self.wake is not None:
+            # Participants' speech is transcribed too, for the transcript store and wake phrase.
+            session["input_audio_transcription"] = {"model": "whisper-1"}
+        if self.knowledge is not None:
+            # Product docs and pricing, searched locally when the model calls the tool.
+            session["tools"] = [KNOWLEDGE_TOOL]
+            session["tool_choice"] = "auto"
+        await self.ws.send(json.dumps({"type": "session.update", "session": session}))
+        if reconnecting and self.context is not None:
+            # A new connection starts with an empty conversation; old item ids are gone
+            self.context.reset()
         self.connected.set()
-        asyncio.create_task(self._reader())
+        self.egress.start()
+        self._reader_task = asyncio.create_task(self._reader())
+
+    def _spawn(self, coro):
+        # Run coro in the background; a failure is logged, not left unretrieved
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("openai_task_failed", bot_id=self.bot_id, error=repr(task.exception()))
+
+    async def ensure_connected(self):
+        # Connect at most once, even if audio arrives while connecting
+        async with self.lock:
+            if not self.connected.is_set():
+                await self.connect()
 
     async def _reader(self):
+        ws = self.ws
         try:
-            async for msg in self.ws:
-                event = json.loads(msg)
-                t = event.get("type", "")
-                # Realtime WS sends audio frames as base64 "delta" chunks; names vary by release.
-                # Commonly seen: "response.audio.delta" / "response.audio.done".  [oai_citation:4‡Medium](https://medium.com/thedeephub/building-a-voice-enabled-python-fastapi-app-using-openais-realtime-api-bfdf2947c3e4?utm_source=chatgpt.com)
-                if t == "response.audio.delta":
-                    chunk_b64 = event.get("delta", "")
-                    if chunk_b64:
-                        self.audio_buffer += base64.b64decode(chunk_b64)
-                elif t in (
-                    "response.audio.done",
-                    "response.completed",
-                    "response.done",
-                ):
-                    # Signal to whoever is waiting that an utterance finished.
-                    pass
-        except Exception:
-            self.connected.clear()
+            async for msg in ws:
+                event = parse_server_event(msg)
+                try:
+                    await self._handle(event)
+                except Exception:
+                    # A bug in one handler must not look like a dead socket
+                    log.exception("openai_event_failed", bot_id=self.bot_id, type=event.get("type"))
+        except (websockets.exceptions.ConnectionClosed, OSError) as e:
+            log.warning("openai_connection_lost", bot_id=self.bot_id, error=repr(e))
+        await ws.close()  # The old socket may only be half closed; don't leak it
+        if self.closing or self.ws is not ws:
+            return  # Shutting down, or a sender already reconnected
+        self.connected.clear()
+        # Reconnect right away; connect() replays the session.update, and
+        # meeting audio waits in the ingress queue meanwhile.
+        self._spawn(self.ensure_connected())
+
+    async def _handle(self, event: dict):
+        t = event.get("type", "")
+        if self.capture is not None:
+            self.capture.event(event)
+        if not self.barge_in.observe(event):
+            return  # Audio of an interrupted response
+        if self.wake is not None and self.wake.observe(event):
+            await self._send_event({"type": "response.create"})
+        if self.context is not None and self.context.observe(event):
+            await self.context.compact()
+        # Realtime WS sends audio frames as base64 "delta" chunks; names vary by release.
+        # Commonly seen: "response.audio.delta" / "response.audio.done".  [oai_citation:4‡Medium](https://medium.com/thedeephub/building-a-voice-enabled-python-fastapi-app-using-openais-realtime-api-bfdf2947c3e4?utm_source=chatgpt.com)
+        if t == "response.audio.delta":
+            chunk_b64 = event.get("delta", "")
+            if chunk_b64:
+                self.tracer.audio_delta()
+                self.egress.feed_b64(chunk_b64)
+        elif t == "response.audio_transcript.delta":
+            self.egress.transcript_delta(event.get("delta", ""))
+            if self.chat:
+                self.chat.delta(event.get("delta", ""))
+        elif t == "response.text.delta" and self.chat:
+            self.chat.delta(event.get("delta", ""))
+        elif t == "response.text.done":
+            if self.chat:
+                self.chat.finish()
+            if self.transcripts:
+                self.transcripts.add_utterance(self.bot_id, "assistant", event.get("text", ""))
+        elif t == "response.audio.done":
+            # Ship the tail of the utterance and close the turn.
+            self.tracer.audio_done()
+            self.egress.finish()
+        elif t == "input_audio_buffer.speech_stopped":
+            self.tracer.speech_stopped()
+        elif t == "response.done":
+            self.tracer.response_done(event)
+            if self.knowledge:
+                await self.knowledge.response_done(event)
+        elif t == "input_audio_buffer.speech_started":
+            await self.barge_in.interrupt()
+        elif t == "response.function_call_arguments.done" and self.knowledge:
+            await self.knowledge.handle(event)
+        elif t == "response.audio_transcript.done":
+            if self.chat:
+                self.chat.finish()
+            if self.transcripts:
+                self.transcripts.add_utterance(
+                    self.bot_id, "assistant", event.get("transcript", "")
+                )
+        elif t == "conversation.item.created":
+            item = event.get("item") or {}
+            if self.transcripts and self.speakers and item.get("role") == "user":
+                self._item_speakers[item.get("id")] = self.speakers.speaker()
+        elif t == "conversation.item.input_audio_transcription.completed":
+            speaker = self._item_speakers.pop(event.get("item_id"), None)
+            if self.transcripts:
+                self.transcripts.add_utterance(
+                    self.bot_id, "user", event.get("transcript", ""), speaker=speaker
+                )
+        elif t == "conversation.item.input_audio_transcription.failed":
+            self._item_speakers.pop(event.get("item_id"), None)
 
     async def push_meeting_audio_pcm16(self, pcm16_b64: str):
         # Stream Recall's meeting audio into OpenAI
         # OpenAI expects base64 audio for inputAudioBuffer.append.  [oai_citation:5‡Microsoft Learn](https://learn.microsoft.com/en-us/azure/ai-foundry/openai/realtime-audio-reference?utm_source=chatgpt.com)
-        if not self.connected.is_set():
-            await self.connect()
-        await self.ws.send(
-            json.dumps({"type": "input_audio_buffer.append", "audio": pcm16_b64})
-        )
+        self.push_pcm16(base64.b64decode(pcm16_b64))
+
+    def push_pcm16(self, pcm16: bytes):
+        ingress_frame(len(pcm16))
+        if self.capture is not None:
+            self.capture.ingress(pcm16)
+        if self.vad is not None:
+            pcm16 = self.vad.process(pcm16)
+        self.ingress.start()
+        self.ingress.put(pcm16)
         # With server_vad enabled, OpenAI decides when to commit and respond.
         # If you disable VAD, you'd also send "input_audio_buffer.commit".
 
-    def consume_and_reset_pcm16(self) -> bytes:
-        b = bytes(self.audio_buffer)
-        self.audio_buffer = bytearray()
-        return b
-
+    async def _send_append(self, pcm16: bytes):
+        # One append per coalescing window instead of one per Recall frame
+        await self.ensure_connected()
+        message = append_message(self.wire.encode(pcm16))
+        try:
+            await self.ws.send(message)
+        except websockets.exceptions.ConnectionClosed:
+            # Socket died under us: reconnect and resend instead of losing the audio
+            self.connected.clear()
+            await self.ensure_connected()
+            await self.ws.send(message)
+
+    async def _send_chat(self, text: str):
+        await recall_send_chat(self.bot_id, text)
+        self.tracer.chat_sent()
+
+    async def _send_event(self, event: dict):
+        if self.connected.is_set():
+            try:
+                await self.ws.send(dumps(event))
+            except websockets.exceptions.ConnectionClosed:
+                pass  # The reader reconnects; a stale cancel/truncate is moot
+
+    async def _stop_audio(self):
+        self.playback.reset()
+        if self.bot_id is not None:
+            await recall_stop_audio(self.bot_id)
+
+    async def _encode(self, pcm16) -> str:
+        with self.tracer.encode():
+            return await self.jobs.run(encode_pcm16_to_mp3, pcm16)
+
+    async def speak_back(self, mp3_b64: str):
+        """Send one encoded segment to Zoom via this client's Recall bot."""
+        if self.bot_id is None:
+            return
+        await self.playback.play(mp3_b64)
+
+    async def _post_audio(self, mp3_b64: str):
+        with self.tracer.recall_post():
+            await recall_output_audio(self.bot_id, mp3_b64)
+        return True
+
+    async def close(self):
+        log.info("ingress", bot_id=self.bot_id, **self.ingress.stats())
+        if self.vad is not None:
+            log.info("vad_gate", bot_id=self.bot_id, **self.vad.stats())
+        if self.wake is not None:
+            log.info("wake_gate", bot_id=self.bot_id, **self.wake.stats())
+        if self.context is not None:
+            log.info("context", bot_id=self.bot_id, **self.context.stats())
+        self.closing = True
+        self.connected.clear()
+        if self._reader_task:
+            self._reader_task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        if self.chat:
+            self.chat.close()
+        if self.speakers is not None:
+            self.speakers.close()
+        await self.ingress.close()
+        await self.egress.close()
+        if self.capture is not None:
+            self.capture.close()
+        if self.ws is not None:
+            await self.ws.close()
 
-oai = OpenAIRealtimeClient()
 
 # --- Recall.ai helpers ----------------------------------------------------------
 
-RECALL_BASE = "https://us-west-2.recall.ai/api/v1"
-http = httpx.AsyncClient(timeout=30.0)
+RECALL_BASE = os.getenv("RECALL_API_BASE", "https://us-west-2.recall.ai/api/v1")
 
 
 async def create_recall_bot(realtime_ws_url: str) -> dict:
@@ -122,19 +349,17 @@ async def create_recall_bot(realtime_ws_url: str) -> dict:
     # Per docs, realtime_endpoints can include "audio_mixed_raw.data".
     # Output audio endpoint requires bots to be created with automatic_audio_output configured
     # (use a tiny silent MP3 to satisfy the requirement).  [oai_citation:6‡Recall.ai](https://docs.recall.ai/docs/real-time-audio-protocol)
-    silent_mp3_b64 = base64.b64encode(
-        AudioSegment.silent(duration=300).export(format="mp3").read()
-    ).decode()
+    silent_mp3_b64 = RecallAI.generate_silence(duration_ms=300)
 
     payload = {
         "meeting_url": ZOOM_MEETING_URL,
         "recording_config": {
-            "audio_mixed_raw": {},
+            raw_audio_config(): {},
             "realtime_endpoints": [
                 {
                     "type": "websocket",
                     "url": realtime_ws_url,
-                    "events": ["audio_mixed_raw.data"],
+                    "events": realtime_events(),
                 }
             ],
         },
@@ -142,10 +367,12 @@ async def create_recall_bot(realtime_ws_url: str) -> dict:
             "in_call_recording": {"data": {"kind": "mp3", "b64_data": silent_mp3_b64}}
         },
     }
-    r = await http.post(
+    r = await recall_request(
+        "POST",
         f"{RECALL_BASE}/bot/",
         headers={"Authorization": RECALL_API_KEY, "Content-Type": "application/json"},
         json=payload,
+        idempotent=False,
     )
     r.raise_for_status()
     return r.json()
@@ -153,72 +380,135 @@ async def create_recall_bot(realtime_ws_url: str) -> dict:
 
 async def recall_output_audio(bot_id: str, mp3_b64: str):
     # POST /bot/{id}/output_audio/ with {"kind": "mp3", "b64_data": "..."}  [oai_citation:7‡Recall.ai](https://docs.recall.ai/docs/output-audio-in-meetings)
-    r = await http.post(
+    r = await recall_request(
+        "POST",
         f"{RECALL_BASE}/bot/{bot_id}/output_audio/",
         headers={"Authorization": RECALL_API_KEY, "Content-Type": "application/json"},
         json={"kind": "mp3", "b64_data": mp3_b64},
+        timeout=10.0,
+        idempotent=False,
+    )
+    r.raise_for_status()
+
+
+async def recall_stop_audio(bot_id: str):
+    # DELETE /bot/{id}/output_audio/ stops whatever the bot is playing
+    r = await recall_request(
+        "DELETE",
+        f"{RECALL_BASE}/bot/{bot_id}/output_audio/",
+        headers={"Authorization": RECALL_API_KEY},
+        timeout=5.0,
     )
     r.raise_for_status()
 
 
+async def recall_send_chat(bot_id: str, message: str):
+    # POST /bot/{id}/send_chat_message/ to everyone, or privately to CHAT_TO
+    payload = {"message": message}
+    if chat_to() != "everyone":
+        payload["to"] = chat_to()
+    r = await recall_request(
+        "POST",
+        f"{RECALL_BASE}/bot/{bot_id}/send_chat_message/",
+        headers={"Authorization": RECALL_API_KEY, "Content-Type": "application/json"},
+        json=payload,
+        timeout=10.0,
+        idempotent=False,
+    )
+    r.raise_for_status()
+
+
+async def recall_participants(bot_id: str) -> list:
+    # GET /bot/{id}/ lists who is in the meeting
+    r = await recall_request(
+        "GET", f"{RECALL_BASE}/bot/{bot_id}/", headers={"Authorization": RECALL_API_KEY}
+    )
+    r.raise_for_status()
+    return r.json().get("meeting_participants", [])
+
+
+# --- Turn MP3 playback back into the meeting -----------------------------------
+
+
+# In-process LAME when available; pydub (ffmpeg under the hood) otherwise.
+# OpenAI's pcm16 output is 24 kHz; encoding it at any other rate changes its
+# speed and pitch and puts barge-in's played offset off from what was heard.
+mp3_encoder = Mp3Encoder(sample_rate=ASSISTANT_SAMPLE_RATE, bitrate=64)
+
+
+def encode_pcm16_to_mp3(pcm16: bytes) -> str:
+    """Encode one segment of 24 kHz assistant PCM16 to base64 MP3."""
+    return mp3_encoder.encode_b64(pcm16)
+
+
 # --- FastAPI app & the Recall realtime WebSocket endpoint ----------------------
 
 app = FastAPI()
 
-BOT_ID = None
+# One OpenAIRealtimeClient per bot, keyed by bot id (MAX_SESSIONS per process).
+sessions = SessionManager()
+metrics.track_sessions(sessions)
 
 
 @app.on_event("startup")
 async def startup():
-    # Expose /recall as a wss URL publicly (e.g., via Cloud Run/Render + TLS,
-    # or use an ngrok tunnel while developing). Use that wss URL in create_recall_bot().
-    # See Recall’s docs for local tunneling.  [oai_citation:8‡Recall.ai](https://docs.recall.ai/docs/real-time-audio-protocol)
-    asyncio.create_task(oai.connect())
+    app.state.lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag())
 
 
-@app.websocket("/recall")
-async def recall_ws(ws: WebSocket):
-    await ws.accept()
-    print("Recall connected")
-    try:
-        while True:
-            raw = await ws.receive_text()
-            event = json.loads(raw)
-            if event.get("event") == "audio_mixed_raw.data":
-                b64_pcm = event["data"]["data"][
-                    "buffer"
-                ]  # 16kHz mono PCM16 (base64)  [oai_citation:9‡Recall.ai](https://docs.recall.ai/docs/real-time-audio-protocol)
-                await oai.push_meeting_audio_pcm16(b64_pcm)
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.lag_monitor.cancel()
+    await sessions.close_all()
+    await close_http_client()
+    shutdown_workers()
+    close_transcript_store()
 
-                # Heuristic: occasionally check if OpenAI has finished an utterance.
-                # In server_vad mode, the model tends to emit chunks and then finish.
-                # Here, every ~500ms we drain and if there's enough, transcode & play.
-                if len(oai.audio_buffer) > 48000:  # ~1.5s of 16k PCM16 mono
-                    await maybe_speak_back()
-            else:
-                # ignore other events here, or log them
-                pass
-    except WebSocketDisconnect:
-        print("Recall disconnected")
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus scrape target: turn latency, queue depths, event-loop lag.
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
-# --- Turn MP3 playback back into the meeting -----------------------------------
+
+async def record_participants(oai: OpenAIRealtimeClient):
+    # Attach the participant list to this meeting's transcript once the bot is in
+    try:
+        participants = await oai.participants.get()
+    except Exception as e:
+        log.warning("participants_failed", bot_id=oai.bot_id, error=e)
+        return
+    oai.transcripts.add_meeting(oai.bot_id, participants=participants)
 
 
-async def maybe_speak_back():
-    """If we have accumulated assistant PCM16, flush it, encode to MP3, and send to Zoom via Recall."""
-    global BOT_ID
-    pcm16 = oai.consume_and_reset_pcm16()
-    if not pcm16 or BOT_ID is None:
+@app.websocket("/recall/{token}")
+async def recall_ws(ws: WebSocket, token: str):
+    oai = sessions.by_token(token)
+    if oai is None:
+        await ws.close(code=1008)
         return
-    # Encode PCM16 -> MP3 (pydub uses ffmpeg under the hood).
-    audio = AudioSegment(
-        data=pcm16, sample_width=2, frame_rate=16000, channels=1  # 16-bit
-    )
-    buf = BytesIO()
-    audio.export(buf, format="mp3", bitrate="64k")
-    mp3_b64 = base64.b64encode(buf.getvalue()).decode()
-    await recall_output_audio(BOT_ID, mp3_b64)
+    await ws.accept()
+    log.info("recall_connected", bot_id=oai.bot_id)
+    if oai.transcripts is not None:
+        oai._spawn(record_participants(oai))
+    try:
+        while True:
+            raw = await ws.receive_text()
+            # Fast path: pull data.data.buffer out without parsing the envelope.
+            b64_pcm = recall_audio_b64(
+                raw
+            )  # 16kHz mono PCM16 (base64)  [oai_citation:9‡Recall.ai](https://docs.recall.ai/docs/real-time-audio-protocol)
+            if b64_pcm is not None:
+                await oai.push_meeting_audio_pcm16(b64_pcm)
+            elif oai.speakers is not None:
+                # Per-speaker audio and participant events (SPEAKER_ALLOWLIST)
+                pcm16 = oai.speakers.observe(raw)
+                if pcm16:
+                    oai.push_pcm16(pcm16)
+    except WebSocketDisconnect:
+        log.info("recall_disconnected", bot_id=oai.bot_id)
+    finally:
+        await sessions.close(oai.bot_id)
 
 
 # --- Simple one-shot helper to launch a bot against your Zoom URL --------------
@@ -229,8 +519,29 @@ async def spawn_bot(public_wss: str):
     """
     Hit: http://localhost:8000/spawn-bot?public_wss=wss://your-domain/recall
     Returns bot info; keep the ID handy for debugging in Recall dashboard.
+    Call it again to add more bots; each gets its own /recall/{token} path.
     """
-    global BOT_ID
-    bot = await create_recall_bot(realtime_ws_url=public_wss)
-    BOT_ID = bot["id"]
+    bot = {}
+
+    async def open_session():
+        # Expose /recall as a wss URL publicly (e.g., via Cloud Run/Render + TLS,
+        # or use an ngrok tunnel while developing).
+        # See Recall’s docs for local tunneling.  [oai_citation:8‡Recall.ai](https://docs.recall.ai/docs/real-time-audio-protocol)
+        client = OpenAIRealtimeClient()
+        bot.update(
+            await create_recall_bot(
+                realtime_ws_url=f"{public_wss.rstrip('/')}/{client.token}"
+            )
+        )
+        client.bot_id = bot["id"]
+        if client.transcripts is not None:
+            client.transcripts.add_meeting(client.bot_id, meeting_url=ZOOM_MEETING_URL)
+        # Connect in the background; a failure is logged and retried by the next append
+        client._spawn(client.ensure_connected())
+        return client
+
+    try:
+        await sessions.open(open_session)
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     return bot
@@ -0,0 +1,193 @@
+import base64
+import collections
+import hashlib
+import os
+import threading
+import wave
+
+import numpy as np
+
+from encoder import Mp3Encoder, resample
+from logs import get_logger
+
+log = get_logger("assets")
+
+_cache = None
+
+
+class AudioAssetCache:
+    """
+    Encoded (base64 MP3) audio assets keyed by content hash and encoding
+    parameters: an in-memory LRU in front of an on-disk LRU.
+
+    Silence, filler clips and other canned audio are encoded once per
+    machine; after that a lookup is a dictionary hit, or one small file read
+    after a restart. Safe to use from audio worker threads.
+    """
+
+    def __init__(self, directory=None, max_items=256, max_disk_bytes=None):
+        # Where encoded assets survive restarts, and how much disk they may use
+        self.directory = directory or os.getenv("AUDIO_CACHE_DIR", ".audio_cache")
+        self.max_items = max_items
+        if max_disk_bytes is None:
+            max_disk_bytes = int(os.getenv("AUDIO_CACHE_MB", "64")) * 1024 * 1024
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        self._disk_bytes = None  # scanned lazily on first write
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts):
+        # Stable key from content (bytes-like) and encoding parameters
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            if not isinstance(part, (bytes, bytearray, memoryview)):
+                part = repr(part).encode("utf-8")
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        b64 = self._memory.get(key)
+        if b64 is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return b64
+        mp3 = self._read(key)
+        if mp3 is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        b64 = base64.b64encode(mp3).decode("utf-8")
+        self._remember(key, b64)
+        return b64
+
+    def put(self, key, b64, persist=True):
+        with self._lock:
+            self._remember(key, b64)
+            if persist:
+                self._write(key, base64.b64decode(b64))
+
+    def get_or_create(self, key, make, persist=True):
+        # Return the cached asset, or build it with make() and cache it
+        b64 = self.get(key)
+        if b64 is None:
+            b64 = make()
+            self.put(key, b64, persist=persist)
+        return b64
+
+    def encode_b64(self, pcm, encoder, persist=True):
+        # Mp3Encoder.encode_b64 with the result cached by PCM content and encoder settings
+        key = self.key(pcm, "mp3", encoder.sample_rate, encoder.bitrate, encoder.backend)
+        return self.get_or_create(key, lambda: encoder.encode_b64(pcm), persist=persist)
+
+    def _remember(self, key, b64):
+        self._memory[key] = b64
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mp3 = f.read()
+            os.utime(path)  # Recently used: evicted last
+        except OSError:
+            return None
+        return mp3
+
+    def _write(self, key, mp3):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(mp3)
+            os.replace(tmp, path)  # Readers never see a partial file
+        except OSError as e:
+            log.warning("asset_write_failed", key=key, directory=self.directory, error=e)
+            return
+        self._disk_bytes += len(mp3)
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict()
+
+    def _disk_entries(self):
+        # (path, size, mtime) of every cached file
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        # Delete least recently used files until the cache fits again
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        self._disk_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+
+
+def get_asset_cache():
+    # One cache per process, shared by every bot
+    global _cache
+    if _cache is None:
+        _cache = AudioAssetCache()
+    return _cache
+
+
+def silence_b64(duration_ms=300, sample_rate=16000):
+    # Silent MP3, encoded once per duration and sample rate
+    encoder = Mp3Encoder(sample_rate=sample_rate)
+    cache = get_asset_cache()
+    key = cache.key("silence", duration_ms, sample_rate, encoder.bitrate, encoder.backend)
+    return cache.get_or_create(
+        key, lambda: encoder.encode_b64(bytes(sample_rate * 2 * duration_ms // 1000))
+    )
+
+
+def clip_b64(path, encoder):
+    """
+    Encode a WAV clip (e.g. a "one moment" filler) for playback with
+    ``encoder``, cached by the file's audio content.
+
+    The clip must be 16-bit PCM; it is mixed down to mono and resampled to
+    the encoder's sample rate.
+    """
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV clips are supported")
+        channels = f.getnchannels()
+        rate = f.getframerate()
+        pcm = f.readframes(f.getnframes())
+    cache = get_asset_cache()
+    key = cache.key(pcm, channels, rate, "mp3", encoder.sample_rate, encoder.bitrate, encoder.backend)
+
+    def make():
+        mono = pcm
+        if channels > 1:
+            frames = np.frombuffer(pcm, dtype="<i2").reshape(-1, channels)
+            mono = frames.mean(axis=1).astype("<i2").tobytes()
+        return encoder.encode_b64(resample(mono, rate, encoder.sample_rate))
+
+    return cache.get_or_create(key, make)
@@ -0,0 +1,82 @@
+import binascii
+
+from logs import get_logger
+
+log = get_logger("audiobuffer")
+
+
+class AudioBuffer:
+    """
+    Bounded, append-only byte buffer for streaming PCM.
+
+    Appended audio is written into a preallocated region; ``consume`` and
+    ``view`` hand out ``memoryview`` slices of that region without copying.
+    Bytes that have been written are never overwritten: when the region is
+    full, the unread tail moves to a fresh, larger region and the old one is
+    left to the views that still reference it. Slices stay valid for as long
+    as the caller keeps them.
+
+    At most ``max_bytes`` of unread audio are held. Anything appended beyond
+    that is dropped and counted in ``dropped``, so a runaway response cannot
+    exhaust memory.
+    """
+
+    def __init__(self, capacity=48000, max_bytes=24000 * 2 * 120):
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._region = bytearray(min(capacity, max_bytes))
+        self._view = memoryview(self._region)
+        self._start = 0  # first unread byte
+        self._end = 0  # one past the last written byte
+
+    def __len__(self):
+        return self._end - self._start
+
+    def append(self, data):
+        """Copy bytes-like ``data`` in; returns the number of bytes kept."""
+        size = len(data)
+        room = self.max_bytes - len(self)
+        if size > room:
+            if not self.dropped:
+                log.warning("audio_buffer_full", max_bytes=self.max_bytes)
+            self.dropped += size - room
+            data = memoryview(data)[:room]
+            size = room
+        if self._end + size > len(self._region):
+            self._move(size)
+        self._view[self._end : self._end + size] = data
+        self._end += size
+        return size
+
+    def append_b64(self, b64_data):
+        # Decode one base64 delta and copy it in. The standard library cannot
+        # decode into an existing buffer, so this costs one temporary bytes
+        # object and one copy; reads from the buffer are still zero-copy.
+        return self.append(binascii.a2b_base64(b64_data))
+
+    def view(self, start=0, end=None):
+        """Zero-copy slice of the unread audio, relative to the read position."""
+        end = len(self) if end is None else min(end, len(self))
+        return self._view[self._start + start : self._start + end]
+
+    def consume(self, size=None):
+        """Return the next ``size`` unread bytes (all by default) and advance."""
+        chunk = self.view(0, size)
+        self._start += len(chunk)
+        return chunk
+
+    def clear(self):
+        self._start = self._end
+
+    def _move(self, incoming):
+        # Start a new region with room for the unread tail plus the new data
+        unread = len(self)
+        capacity = len(self._region)
+        while capacity < unread + incoming:
+            capacity *= 2
+        region = bytearray(min(capacity, self.max_bytes))
+        region[:unread] = self._view[self._start : self._end]
+        self._region = region
+        self._view = memoryview(region)
+        self._start = 0
+        self._end = unread
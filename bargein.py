@@ -0,0 +1,110 @@
+import asyncio
+import inspect
+import time
+
+from logs import get_logger
+from metrics import BARGE_IN_SECONDS
+
+log = get_logger("bargein")
+
+# Events that belong to one response and are dropped once it is cancelled
+RESPONSE_AUDIO_EVENTS = (
+    "response.audio.delta",
+    "response.audio_transcript.delta",
+    "response.audio.done",
+)
+
+
+class BargeInController:
+    """
+    Stop the bot talking the moment a participant starts to speak.
+
+    Follows the response in flight (``response.created`` / ``response.done``)
+    and the item being spoken (from ``response.audio.delta``). On
+    ``input_audio_buffer.speech_started`` while the bot is answering or still
+    audible, ``interrupt`` drops the egress queue and in-flight segment,
+    stops Recall playback, cancels the response and truncates the item at the
+    played offset, so the model only remembers what the meeting heard.
+
+    ``stop_audio()`` and ``send_event(event)`` may be plain functions or
+    coroutine functions.
+    """
+
+    def __init__(self, egress, stop_audio, send_event):
+        self.egress = egress
+        self.stop_audio = stop_audio
+        self.send_event = send_event
+        self.interruptions = 0
+        self._response_id = None
+        self._responding = False
+        self._item_id = None
+        self._content_index = 0
+        self._cancelled = set()
+
+    def observe(self, event):
+        """
+        Track response state from a server event. Returns False for audio of
+        a response that was already interrupted, which must not be played.
+        """
+        t = event.get("type")
+        if t in RESPONSE_AUDIO_EVENTS:
+            if event.get("response_id") in self._cancelled:
+                return False
+            if t == "response.audio.delta":
+                self._item_id = event.get("item_id", self._item_id)
+                self._content_index = event.get("content_index", 0)
+        elif t == "response.created":
+            self._response_id = event.get("response", {}).get("id")
+            self._responding = True
+            self._item_id = None
+        elif t == "response.done":
+            if event.get("response", {}).get("id") in (None, self._response_id):
+                self._responding = False
+            self._cancelled.discard(event.get("response", {}).get("id"))
+        return True
+
+    async def interrupt(self):
+        """Silence the bot if it is answering; returns True if it was."""
+        if not (self._responding or self.egress.speaking):
+            return False
+        start = time.perf_counter()
+        played_ms = self.egress.played_ms()
+        self.egress.interrupt()
+
+        events = []
+        if self._responding:
+            events.append({"type": "response.cancel"})
+            if self._response_id is not None:
+                self._cancelled.add(self._response_id)
+            self._responding = False
+        if self._item_id is not None:
+            events.append(
+                {
+                    "type": "conversation.item.truncate",
+                    "item_id": self._item_id,
+                    "content_index": self._content_index,
+                    "audio_end_ms": int(played_ms),
+                }
+            )
+            self._item_id = None
+
+        await asyncio.gather(self._stop_playback(), self._send(events))
+        elapsed = time.perf_counter() - start
+        self.interruptions += 1
+        BARGE_IN_SECONDS.observe(elapsed)
+        log.info("barge_in", silenced_ms=round(elapsed * 1000), played_ms=round(played_ms))
+        return True
+
+    async def _stop_playback(self):
+        try:
+            result = self.stop_audio()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            log.error("stop_audio_failed", error=e)
+
+    async def _send(self, events):
+        for event in events:
+            result = self.send_event(event)
+            if inspect.isawaitable(result):
+                await result
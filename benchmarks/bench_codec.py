@@ -0,0 +1,114 @@
+"""
+Events per second per core for the websocket hot path.
+
+Compares full json parsing/serialising with the fast-path codec (orjson
+when installed) for Recall audio frames (mixed and per-speaker), OpenAI
+audio deltas and outgoing input_audio_buffer.append messages.
+
+    python benchmarks/bench_codec.py [--seconds 2]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import codec  # noqa: E402
+
+
+def recall_frame(ms=100, event="audio_mixed_raw.data", **extra):
+    # Shape of a Recall audio_mixed_raw.data event carrying 16 kHz PCM16
+    pcm = os.urandom(16000 * 2 * ms // 1000)
+    return json.dumps(
+        {
+            "event": event,
+            "data": {
+                "data": {
+                    "buffer": base64.b64encode(pcm).decode(),
+                    "timestamp": {"relative": 12.34, "absolute": "2024-10-01T12:00:00Z"},
+                    **extra,
+                },
+                "realtime_endpoint": {"id": "re_123", "metadata": {}},
+                "recording": {"id": "rec_123", "metadata": {}},
+                "bot": {"id": "bot_123", "metadata": {}},
+            },
+        }
+    )
+
+
+def audio_delta(ms=200):
+    # Shape of an OpenAI response.audio.delta carrying 24 kHz PCM16
+    pcm = os.urandom(24000 * 2 * ms // 1000)
+    return json.dumps(
+        {
+            "type": "response.audio.delta",
+            "event_id": "event_123",
+            "response_id": "resp_123",
+            "item_id": "item_123",
+            "output_index": 0,
+            "content_index": 0,
+            "delta": base64.b64encode(pcm).decode(),
+        },
+        separators=(",", ":"),
+    )
+
+
+def rate(fn, seconds):
+    # Calls per second of fn on one core
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(100):
+            fn()
+        count += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    frame = recall_frame()
+    speaker_frame = recall_frame(
+        event="audio_separate_raw.data",
+        participant={"id": 100, "name": "Alice", "is_host": True, "platform": "desktop"},
+    )
+    delta = audio_delta()
+    pcm = os.urandom(16000 * 2 * 60 // 1000)  # one 60 ms coalesced append
+
+    cases = [
+        ("recall frame", "json.loads", lambda: json.loads(frame)["data"]["data"]["buffer"]),
+        ("recall frame", "codec.recall_audio_b64", lambda: codec.recall_audio_b64(frame)),
+        ("speaker frame", "json.loads", lambda: json.loads(speaker_frame)),
+        (
+            "speaker frame",
+            "codec.recall_separate_audio",
+            lambda: codec.recall_separate_audio(speaker_frame),
+        ),
+        ("audio delta", "json.loads", lambda: json.loads(delta)),
+        ("audio delta", "codec.parse_server_event", lambda: codec.parse_server_event(delta)),
+        (
+            "append",
+            "json.dumps",
+            lambda: json.dumps(
+                {"type": "input_audio_buffer.append", "audio": base64.b64encode(pcm).decode()}
+            ),
+        ),
+        ("append", "codec.append_message", lambda: codec.append_message(pcm)),
+    ]
+
+    print(f"orjson: {'yes' if codec.orjson is not None else 'no'}")
+    print(f"{'event':<14} {'path':<28} {'events/s/core':>14}")
+    for event, path, fn in cases:
+        print(f"{event:<14} {path:<28} {rate(fn, args.seconds):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Ingress DSP throughput per core: 16 kHz meeting audio to the OpenAI wire format.
+
+Compares the previous path (none: 16 kHz PCM16 sent as is; or np.interp
+per frame) with the streaming polyphase resampler to 24 kHz PCM16 and to
+8 kHz G.711 mu-law. Reports the realtime factor (seconds of audio per
+second of CPU, i.e. how many meetings one core keeps up with) and wire
+bytes per second of audio.
+
+    python benchmarks/bench_dsp.py [--seconds 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dsp import G711_ULAW, PCM16, IngressCodec  # noqa: E402
+from encoder import resample  # noqa: E402
+
+IN_RATE = 16000
+
+
+def speech_like(seconds, rate=IN_RATE):
+    # Harmonic tone with a slow envelope plus a little noise, as PCM16 bytes
+    t = np.arange(int(seconds * rate)) / rate
+    tone = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 540, 1200)))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    signal = 6000 * tone * envelope + np.random.default_rng(0).normal(0, 200, len(t))
+    return np.clip(signal, -32768, 32767).astype("<i2").tobytes()
+
+
+def realtime_factor(fn, frames, frame_seconds, seconds):
+    # Seconds of audio processed per CPU second, feeding frames in order
+    processed = 0
+    start = time.process_time()
+    while True:
+        for frame in frames:
+            fn(frame)
+        processed += len(frames)
+        elapsed = time.process_time() - start
+        if elapsed >= seconds:
+            return processed * frame_seconds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    audio = speech_like(10)
+    print(f"{'frame':>6} {'path':<28} {'x realtime':>12} {'wire B/s':>9}")
+    for frame_ms in (20, 100):
+        size = IN_RATE * 2 * frame_ms // 1000
+        frames = [audio[i : i + size] for i in range(0, len(audio) - size + 1, size)]
+        cases = [
+            ("pcm16 16k passthrough", lambda f: f, IN_RATE * 2),
+            ("np.interp 16k->24k", lambda f: resample(f, IN_RATE, 24000).tobytes(), 48000),
+        ]
+        for fmt in (PCM16, G711_ULAW):
+            codec = IngressCodec(fmt, in_rate=IN_RATE)
+            wire = len(b"".join(codec.encode(f) for f in frames)) / (len(frames) * frame_ms / 1000)
+            codec.resampler.reset()
+            cases.append((f"polyphase {fmt}", codec.encode, wire))
+        for name, fn, wire_rate in cases:
+            factor = realtime_factor(fn, frames, frame_ms / 1000, args.seconds)
+            print(f"{frame_ms:>4}ms {name:<28} {factor:>12,.0f} {wire_rate:>9,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Microbenchmark: pydub/ffmpeg vs in-process encoding of the assistant's voice.
+
+Compares the original convert_audio_to_mp3 chain (three pydub resampling
+passes plus an ffmpeg export) with the vectorized resample + Mp3Encoder path
+used by api.py, on 1 s, 10 s and 60 s clips.
+
+    python benchmarks/bench_encoder.py [--repeat 5]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from encoder import Mp3Encoder, lameenc, resample  # noqa: E402
+
+IN_RATE = 48000
+OUT_RATE = 11025
+
+
+def make_clip(seconds):
+    # Speech-like test signal: a few harmonics with a syllable-rate envelope
+    t = np.arange(int(seconds * IN_RATE)) / IN_RATE
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720)))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    return (voice * envelope * 6000).astype("<i2").tobytes()
+
+
+def slow_down(pcm, in_rate, speed, out_rate):
+    """
+    Play PCM16 at `speed` (0.5 = half speed, one octave lower) and return it
+    resampled to out_rate: the pydub chain's transform as one resample from
+    in_rate * speed.
+    """
+    return resample(pcm, int(in_rate * speed), out_rate)
+
+
+def pydub_chain(pcm):
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(
+        io.BytesIO(pcm), format="raw", frame_rate=IN_RATE, channels=1, sample_width=2
+    )
+    audio = audio.set_frame_rate(16000).set_channels(1)
+    audio = audio._spawn(audio.raw_data, overrides={"frame_rate": int(audio.frame_rate * 0.5)})
+    audio = audio.set_frame_rate(OUT_RATE)
+    buf = io.BytesIO()
+    audio.export(buf, format="mp3")
+    return buf.getvalue()
+
+
+def fast_chain(pcm, encoder):
+    return encoder.encode(slow_down(pcm, in_rate=IN_RATE, speed=0.5, out_rate=OUT_RATE))
+
+
+def timeit(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    candidates = {}
+    if lameenc is not None:
+        candidates["lame (in-process)"] = Mp3Encoder(OUT_RATE, backend="lame")
+    candidates["pydub (vectorized resample)"] = Mp3Encoder(OUT_RATE, backend="pydub")
+
+    print(f"{'clip':>6}  {'backend':<30} {'median ms':>10} {'x realtime':>11}")
+    for seconds in (1, 10, 60):
+        pcm = make_clip(seconds)
+        rows = [("pydub (original chain)", lambda: pydub_chain(pcm))]
+        rows += [(name, lambda e=enc: fast_chain(pcm, e)) for name, enc in candidates.items()]
+        for name, fn in rows:
+            try:
+                elapsed = timeit(fn, args.repeat)
+            except Exception as e:  # pydub missing or no ffmpeg on PATH
+                print(f"{seconds:>5}s  {name:<30} {'skipped':>10}  ({e.__class__.__name__})")
+                continue
+            print(f"{seconds:>5}s  {name:<30} {elapsed * 1000:>10.1f} {seconds / elapsed:>10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Load test: event-loop lag while several meetings encode answers at once.
+
+Each simulated meeting encodes a stream of assistant answer segments
+(resample + MP3, as api.py does) either inline on the event loop, as before,
+or through the audio worker pool (thread or process) with per-session
+backpressure. A probe task measures how late the loop wakes up meanwhile.
+
+    python benchmarks/bench_workers.py [--meetings 1 4 8] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_encoder import IN_RATE, OUT_RATE, make_clip, slow_down  # noqa: E402
+from encoder import Mp3Encoder  # noqa: E402
+from workers import AudioWorkers  # noqa: E402
+
+encoder = Mp3Encoder(OUT_RATE)
+
+
+def encode(pcm):
+    return encoder.encode_b64(slow_down(pcm, in_rate=IN_RATE, speed=0.5, out_rate=OUT_RATE))
+
+
+async def meeting(run, segment, stop, counter):
+    # One meeting's egress: encode segments back to back, yielding like a real sender
+    while not stop.is_set():
+        await run(segment)
+        counter[0] += 1
+        await asyncio.sleep(0)
+
+
+async def probe(stop, lags, interval=0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+
+async def scenario(mode, meetings, seconds, segment):
+    workers = None
+    if mode == "inline":
+        async def run(fn, pcm):
+            return fn(pcm)
+
+        runners = [run] * meetings
+    else:
+        workers = AudioWorkers(kind=mode)
+        runners = [workers.jobs().run for _ in range(meetings)]
+
+    stop = asyncio.Event()
+    lags, counter = [], [0]
+    tasks = [asyncio.create_task(probe(stop, lags))]
+    tasks += [
+        asyncio.create_task(meeting(lambda pcm, r=r: r(encode, pcm), segment, stop, counter))
+        for r in runners
+    ]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    if workers is not None:
+        workers.shutdown()
+    lags.sort()
+    return {
+        "segments_per_second": counter[0] / seconds,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--meetings", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--segment", type=float, default=3, help="answer segment seconds")
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+
+    segment = make_clip(args.segment)
+    print(f"{os.cpu_count()} CPU(s), {args.segment:.0f} s segments")
+    print(f"{'meetings':>8}  {'mode':<8} {'seg/s':>7} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for meetings in args.meetings:
+        for mode in args.modes:
+            r = asyncio.run(scenario(mode, meetings, args.seconds, segment))
+            print(
+                f"{meetings:>8}  {mode:<8} {r['segments_per_second']:>7.1f} "
+                f"{r['lag_p50_ms']:>7.1f}ms {r['lag_p99_ms']:>7.1f}ms {r['lag_max_ms']:>7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+"""
+Offline end-to-end benchmark: no Zoom meeting, Recall bot or OpenAI bill.
+
+Runs the app under test (api.py or app.py) as a subprocess against three
+local stand-ins that live in this process:
+
+- a fake Recall REST API (/bot, output_audio, leave_call) that, when a bot is
+  created, starts
+- a fake Recall websocket client, which replays scripted meeting PCM (speech
+  bursts and pauses) into the bot's /audio or /recall endpoint at real-time
+  or accelerated speed, and
+- a fake OpenAI realtime server, which detects the end of each speech burst
+  and answers with a scripted response.audio.delta stream. It keeps the
+  conversation's items and their token counts, honours
+  conversation.item.create / delete, and can add model latency per 1k tokens
+  of context (--context-delay-ms) to show the effect of context compaction.
+
+Per-turn latency is measured where a participant would feel it: from the end
+of a speech burst in the replayed audio to the first output_audio POST for
+that bot. Results for 1..N concurrent meetings go to stdout as JSON.
+
+    python benchmarks/e2e.py --target api --meetings 1 4 16 --duration 30
+    python benchmarks/e2e.py --target app --speed 4 --output bench_output.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+import numpy as np
+import uvicorn
+import websockets
+from fastapi import FastAPI, Request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MEETING_RATE = 16000  # Recall meeting audio
+ASSISTANT_RATE = 24000  # OpenAI pcm16 output
+# Wire rate of the input_audio_format the app declares in session.update
+INPUT_RATES = {"pcm16": 24000, "g711_ulaw": 8000}
+# Rough token cost of conversation items
+USER_AUDIO_TOKENS_PER_S = 10
+ASSISTANT_AUDIO_TOKENS_PER_S = 20
+
+sys.path.insert(0, ROOT)
+from dsp import ulaw_decode  # noqa: E402
+
+
+# --- Scripted meeting audio ------------------------------------------------------
+
+
+def meeting_script(duration, speech_s, pause_s, frame_ms):
+    """
+    Yield (pcm16_frame, speech_ended) for a meeting where someone talks for
+    speech_s, pauses for pause_s, and so on. speech_ended marks the first
+    frame after a burst.
+    """
+    frame_len = MEETING_RATE * frame_ms // 1000
+    rng = np.random.default_rng(0)
+    t = np.arange(frame_len) / MEETING_RATE
+    cycle = speech_s + pause_s
+    elapsed = 0.0
+    was_speech = False
+    while elapsed < duration:
+        speech = (elapsed % cycle) < speech_s
+        if speech:
+            f0 = 140 + 40 * np.sin(elapsed)
+            wave = sum(np.sin(2 * np.pi * f0 * k * (t + elapsed)) / k for k in (1, 2, 3))
+            samples = wave * 5000
+        else:
+            samples = rng.normal(0, 30, frame_len)
+        yield samples.astype("<i2").tobytes(), was_speech and not speech
+        was_speech = speech
+        elapsed += frame_ms / 1000
+
+
+# --- Fake Recall: REST API and realtime websocket client ------------------------
+
+
+class FakeRecall:
+    """Recall REST stand-in; creating a bot starts replaying audio to it."""
+
+    def __init__(self, args):
+        self.args = args
+        self.bots = {}
+        self.app = FastAPI()
+        self.app.add_api_route(
+            "/api/v1/bot/{rest:path}", self.handle, methods=["GET", "POST", "DELETE"]
+        )
+
+    async def handle(self, rest: str, request: Request):
+        parts = [p for p in rest.split("/") if p]
+        if not parts and request.method == "POST":
+            return await self.create_bot(await request.json())
+        bot = self.bots.get(parts[0]) if parts else None
+        if bot is None:
+            return {"detail": "not found"}
+        action = parts[1] if len(parts) > 1 else ""
+        if action == "output_audio" and request.method == "POST":
+            bot["output_audio"].append(time.perf_counter())
+            return {"status": "ok"}
+        if action == "leave_call":
+            bot["left"] = True
+            return {"status": "ok"}
+        return {"id": parts[0], "meeting_participants": []}
+
+    async def create_bot(self, payload):
+        bot_id = str(uuid.uuid4())
+        endpoint = payload["recording_config"]["realtime_endpoints"][0]["url"]
+        # Bots are told to connect to wss://; the app under test listens on plain ws
+        endpoint = endpoint.replace("wss://", "ws://", 1)
+        bot = {
+            "speech_ended": [],
+            "output_audio": [],
+            "frames": 0,
+            "left": False,
+        }
+        self.bots[bot_id] = bot
+        bot["task"] = asyncio.create_task(self.stream(bot_id, bot, endpoint))
+        return {"id": bot_id}
+
+    async def stream(self, bot_id, bot, endpoint):
+        # Replay the meeting script as Recall would (binary for /audio, JSON for /recall)
+        args = self.args
+        frame_s = args.frame_ms / 1000
+        json_events = "/recall/" in endpoint
+        await asyncio.sleep(0.2)  # Recall connects once the bot is admitted
+        async with websockets.connect(endpoint, max_size=None) as ws:
+            start = time.perf_counter()
+            script = meeting_script(args.duration, args.speech, args.pause, args.frame_ms)
+            for i, (pcm, speech_ended) in enumerate(script):
+                if bot["left"]:
+                    break
+                if json_events:
+                    await ws.send(
+                        json.dumps(
+                            {
+                                "event": "audio_mixed_raw.data",
+                                "data": {
+                                    "data": {"buffer": base64.b64encode(pcm).decode()},
+                                    "bot": {"id": bot_id},
+                                },
+                            }
+                        )
+                    )
+                else:
+                    await ws.send(pcm)
+                bot["frames"] += 1
+                if speech_ended:
+                    bot["speech_ended"].append(time.perf_counter())
+                if args.speed > 0:
+                    # Pace frames against the script clock
+                    delay = start + (i + 1) * frame_s / args.speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    await asyncio.sleep(0)
+            bot["stream_seconds"] = time.perf_counter() - start
+            # Keep the socket open while the last answer is played back
+            await asyncio.sleep(args.grace)
+
+
+# --- Fake OpenAI realtime server -------------------------------------------------
+
+
+class FakeOpenAI:
+    """
+    Realtime API stand-in: a tiny energy VAD over the appended audio, then a
+    scripted answer streamed as response.audio.delta events.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.connections = 0
+        self.appended_seconds = 0.0
+        self.append_messages = 0
+        self.context_tokens = []  # Input tokens of every response
+
+    async def handler(self, ws, *_):
+        self.connections += 1
+        await ws.send(json.dumps({"type": "session.created", "session": {}}))
+        items = {}  # item id -> tokens, in conversation order
+        wire_format = "pcm16"
+        in_speech = False
+        speech = silence = 0.0
+        async for raw in ws:
+            event = json.loads(raw)
+            kind = event.get("type")
+            if kind == "session.update":
+                wire_format = event["session"].get("input_audio_format", wire_format)
+                continue
+            if kind == "conversation.item.create":
+                item = event["item"]
+                text = " ".join(c.get("text", "") for c in item.get("content", []))
+                items[item["id"]] = len(text) // 4
+                await ws.send(json.dumps({"type": "conversation.item.created", "item": item}))
+                continue
+            if kind == "conversation.item.delete":
+                if items.pop(event["item_id"], None) is not None:
+                    await ws.send(
+                        json.dumps({"type": "conversation.item.deleted", "item_id": event["item_id"]})
+                    )
+                continue
+            if kind != "input_audio_buffer.append":
+                continue
+            audio = base64.b64decode(event["audio"])
+            if wire_format == "g711_ulaw":
+                samples = ulaw_decode(audio).astype(np.float32)
+            else:
+                samples = np.frombuffer(audio, dtype="<i2").astype(np.float32)
+            seconds = len(samples) / INPUT_RATES[wire_format]
+            self.append_messages += 1
+            self.appended_seconds += seconds
+            rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+            if rms > 1000:
+                if not in_speech:
+                    await ws.send(json.dumps({"type": "input_audio_buffer.speech_started"}))
+                    speech = 0.0
+                in_speech = True
+                silence = 0.0
+                speech += seconds
+            elif in_speech:
+                silence += seconds
+                if silence * 1000 >= self.args.silence_ms:
+                    in_speech = False
+                    await ws.send(json.dumps({"type": "input_audio_buffer.speech_stopped"}))
+                    user_item = f"item_{uuid.uuid4().hex[:12]}"
+                    items[user_item] = int(speech * USER_AUDIO_TOKENS_PER_S)
+                    await ws.send(
+                        json.dumps(
+                            {
+                                "type": "conversation.item.created",
+                                "item": {"id": user_item, "type": "message", "role": "user"},
+                            }
+                        )
+                    )
+                    asyncio.create_task(self.respond(ws, items))
+
+    async def respond(self, ws, items):
+        # Model "thinks" (longer with more context), then streams the answer faster than real time
+        args = self.args
+        context = sum(items.values())
+        self.context_tokens.append(context)
+        await asyncio.sleep(args.model_delay + context / 1000 * args.context_delay_ms / 1000)
+        chunk = ASSISTANT_RATE * 2 // 10  # 100 ms per delta
+        t = np.arange(int(args.answer * ASSISTANT_RATE)) / ASSISTANT_RATE
+        envelope = (np.sin(2 * np.pi * 1.5 * t) > -0.8).astype(np.float32)  # short pauses
+        pcm = (np.sin(2 * np.pi * 180 * t) * envelope * 8000).astype("<i2").tobytes()
+        response_id = f"resp_{uuid.uuid4().hex[:8]}"
+        item_id = f"item_{uuid.uuid4().hex[:12]}"
+        items[item_id] = int(args.answer * ASSISTANT_AUDIO_TOKENS_PER_S)
+        try:
+            await ws.send(
+                json.dumps(
+                    {
+                        "type": "conversation.item.created",
+                        "item": {"id": item_id, "type": "message", "role": "assistant"},
+                    }
+                )
+            )
+            for i in range(0, len(pcm), chunk):
+                await ws.send(
+                    json.dumps(
+                        {
+                            "type": "response.audio.delta",
+                            "response_id": response_id,
+                            "item_id": item_id,
+                            "delta": base64.b64encode(pcm[i : i + chunk]).decode(),
+                        }
+                    )
+                )
+                if i and i % (chunk * 10) == 0:
+                    await ws.send(
+                        json.dumps(
+                            {"type": "response.audio_transcript.delta", "delta": "Sure. "}
+                        )
+                    )
+                await asyncio.sleep(0.1 / args.delta_speedup)
+            await ws.send(json.dumps({"type": "response.audio.done"}))
+            await ws.send(
+                json.dumps(
+                    {
+                        "type": "response.audio_transcript.done",
+                        "item_id": item_id,
+                        "transcript": "Sure. " * int(args.answer),
+                    }
+                )
+            )
+            await ws.send(
+                json.dumps(
+                    {
+                        "type": "response.done",
+                        "response": {"id": response_id, "usage": {"input_tokens": context}},
+                    }
+                )
+            )
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+
+# --- App under test ----------------------------------------------------------------
+
+
+def proc_stats(pid):
+    # (cpu seconds, peak RSS bytes) from /proc; Linux only
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    peak = 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                peak = int(line.split()[1]) * 1024
+    return cpu, peak
+
+
+def metric_sum(text, name):
+    # Sum of all samples of one metric in a Prometheus text exposition
+    total = 0.0
+    for line in text.splitlines():
+        if line.startswith(name) and not line.startswith("#"):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]  # noqa: E731
+    return {
+        "count": len(values),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": values[-1],
+        "mean": statistics.fmean(values),
+    }
+
+
+async def run_one(args, meetings):
+    recall = FakeRecall(args)
+    openai = FakeOpenAI(args)
+    ports = args.base_port, args.base_port + 1, args.base_port + 2
+    app_port, recall_port, openai_port = ports
+
+    recall_server = uvicorn.Server(
+        uvicorn.Config(recall.app, port=recall_port, log_level="warning")
+    )
+    recall_task = asyncio.create_task(recall_server.serve())
+    openai_server = await websockets.serve(
+        openai.handler, "127.0.0.1", openai_port, max_size=None
+    )
+
+    env = dict(
+        os.environ,
+        RECALL_API_KEY="bench",
+        OPENAI_API_KEY="bench",
+        ZOOM_MEETING_URL="https://zoom.example/j/1" if args.target == "app" else "",
+        WEBHOOK_URL=f"http://127.0.0.1:{app_port}",
+        RECALL_API_BASE=f"http://127.0.0.1:{recall_port}/api/v1",
+        OPENAI_REALTIME_URL=f"ws://127.0.0.1:{openai_port}",
+        MAX_SESSIONS=str(max(meetings, 1)),
+    )
+    # The app's output is kept so a run with no answers can show why
+    app_log = tempfile.TemporaryFile() if not args.verbose else None
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{args.target}:app", "--port", str(app_port)],
+        cwd=ROOT,
+        env=env,
+        stdout=app_log,
+        stderr=subprocess.STDOUT if app_log else None,
+    )
+    base = f"http://127.0.0.1:{app_port}"
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            for _ in range(100):
+                try:
+                    await client.get(f"{base}/metrics")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            cpu0, _ = proc_stats(proc.pid)
+            wall0 = time.perf_counter()
+
+            for _ in range(meetings):
+                if args.target == "api":
+                    r = await client.post(
+                        f"{base}/bots", params={"meeting_url": "https://zoom.example/j/1"}
+                    )
+                else:
+                    r = await client.get(
+                        f"{base}/spawn-bot", params={"public_wss": f"ws://127.0.0.1:{app_port}/recall"}
+                    )
+                r.raise_for_status()
+
+            await asyncio.sleep(0.5)
+            await asyncio.gather(
+                *(bot["task"] for bot in recall.bots.values()), return_exceptions=True
+            )
+            wall = time.perf_counter() - wall0
+            cpu1, peak_rss = proc_stats(proc.pid)
+            exposition = (await client.get(f"{base}/metrics")).text
+    finally:
+        # Keep serving the fakes while the app shuts down (bots leave the call)
+        proc.terminate()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(proc.wait), 15)
+        except asyncio.TimeoutError:
+            proc.kill()
+        openai_server.close()
+        await openai_server.wait_closed()
+        recall_server.should_exit = True
+        await recall_task
+
+    latencies = []
+    for bot in recall.bots.values():
+        posts = bot["output_audio"]
+        for ended in bot["speech_ended"]:
+            first = next((p for p in posts if p > ended), None)
+            if first is not None:
+                latencies.append(first - ended)
+    frames = sum(bot["frames"] for bot in recall.bots.values())
+    turns = sum(len(bot["speech_ended"]) for bot in recall.bots.values())
+    lag_count = metric_sum(exposition, "event_loop_lag_seconds_count")
+    if turns and not latencies and app_log is not None:
+        app_log.seek(0)
+        tail = app_log.read().decode("utf-8", "replace").splitlines()[-40:]
+        print(f"{args.target}: no turn was answered; last app output:", file=sys.stderr)
+        print("\n".join(tail), file=sys.stderr)
+    if app_log is not None:
+        app_log.close()
+    return {
+        "target": args.target,
+        "meetings": meetings,
+        "speed": args.speed,
+        "wall_seconds": wall,
+        "ingress_frames": frames,
+        "ingress_frames_per_second": frames / wall if wall else 0.0,
+        "upstream_append_messages": openai.append_messages,
+        "upstream_audio_seconds": openai.appended_seconds,
+        "turns": turns,
+        "answered_turns": len(latencies),
+        "turn_latency_seconds": percentiles(latencies),
+        "context_tokens": percentiles(openai.context_tokens),
+        "cpu_percent": 100 * (cpu1 - cpu0) / wall if wall else 0.0,
+        "peak_rss_bytes": peak_rss,
+        "event_loop_lag_mean_seconds": (
+            metric_sum(exposition, "event_loop_lag_seconds_sum") / lag_count
+            if lag_count
+            else None
+        ),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", choices=("api", "app"), default="api")
+    parser.add_argument("--meetings", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--duration", type=float, default=20.0, help="meeting seconds")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 0 = max")
+    parser.add_argument("--speech", type=float, default=2.0, help="speech burst seconds")
+    parser.add_argument("--pause", type=float, default=4.0, help="pause seconds")
+    parser.add_argument("--frame-ms", type=int, default=20)
+    parser.add_argument("--silence-ms", type=int, default=200, help="fake server VAD")
+    parser.add_argument("--model-delay", type=float, default=0.3)
+    parser.add_argument(
+        "--context-delay-ms", type=float, default=0.0, help="extra model delay per 1k context tokens"
+    )
+    parser.add_argument("--answer", type=float, default=3.0, help="answer seconds")
+    parser.add_argument("--delta-speedup", type=float, default=2.0)
+    parser.add_argument("--grace", type=float, default=5.0)
+    parser.add_argument("--base-port", type=int, default=18080)
+    parser.add_argument("--output", help="also write the JSON results here")
+    parser.add_argument("--verbose", action="store_true", help="show app output")
+    args = parser.parse_args()
+
+    results = []
+    for meetings in args.meetings:
+        results.append(await run_one(args, meetings))
+        print(json.dumps(results[-1]), file=sys.stderr)
+    report = {"results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if any(r["turns"] and not r["answered_turns"] for r in results):
+        sys.exit(1)  # Nothing was answered: the run measured a broken app, not its latency
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,263 @@
+"""
+Record and replay live sessions.
+
+With CAPTURE_DIR set, every session writes a compact binary log of its
+meeting audio (raw PCM16, not base64 JSON) and of the OpenAI events it
+receives. A log can be inspected or fed back through the real session
+pipeline, with the original timing or as fast as possible:
+
+    python capture.py info captures/<bot>.cap
+    python capture.py replay captures/<bot>.cap [--speed 1 | --speed 0]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"ZSCAP\x01"
+# Record header: seconds since capture start, record kind, payload length
+RECORD = struct.Struct("<dBI")
+META_LEN = struct.Struct("<I")
+
+INGRESS = 1  # meeting PCM16 as received from Recall
+EVENT = 2  # an OpenAI server event, JSON
+AUDIO_DELTA = 3  # response.audio.delta: JSON metadata without the delta, then raw PCM16
+
+KIND_NAMES = {INGRESS: "ingress", EVENT: "event", AUDIO_DELTA: "audio_delta"}
+
+
+class CaptureWriter:
+    """
+    Append-only capture log for one session. Writes go to a large userspace
+    buffer, so a tap costs a struct pack and a memcpy on the event loop.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "wb", buffering=1 << 20)
+        self._file.write(MAGIC)
+        self._start = time.perf_counter()
+
+    @classmethod
+    def for_session(cls, name):
+        # A writer in CAPTURE_DIR, or None when capturing is off
+        directory = os.getenv("CAPTURE_DIR")
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, f"{name}-{int(time.time())}.cap"))
+
+    def _write(self, kind, *parts):
+        if self._file.closed:
+            return
+        size = sum(len(p) for p in parts)
+        self._file.write(RECORD.pack(time.perf_counter() - self._start, kind, size))
+        for part in parts:
+            self._file.write(part)
+        self.records += 1
+
+    def ingress(self, pcm):
+        self._write(INGRESS, pcm)
+
+    def event(self, event):
+        if event.get("type") == "response.audio.delta" and "delta" in event:
+            meta = json.dumps({k: v for k, v in event.items() if k != "delta"}).encode("utf-8")
+            self._write(AUDIO_DELTA, META_LEN.pack(len(meta)), meta, base64.b64decode(event["delta"]))
+        else:
+            self._write(EVENT, json.dumps(event).encode("utf-8"))
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class CaptureLog:
+    """
+    Read side of a capture log. The file is memory-mapped and records are
+    yielded as zero-copy memoryviews.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a capture log")
+
+    def __iter__(self):
+        # (seconds, kind, payload) for every complete record
+        view = memoryview(self._map)
+        pos = len(MAGIC)
+        while pos + RECORD.size <= len(view):
+            ts, kind, size = RECORD.unpack_from(view, pos)
+            pos += RECORD.size
+            if pos + size > len(view):
+                break  # Truncated tail of a log that was still being written
+            yield ts, kind, view[pos : pos + size]
+            pos += size
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def decode_event(kind, payload):
+    # Rebuild the OpenAI event dict of an EVENT or AUDIO_DELTA record
+    if kind == EVENT:
+        return json.loads(bytes(payload))
+    (meta_len,) = META_LEN.unpack_from(payload)
+    event = json.loads(bytes(payload[META_LEN.size : META_LEN.size + meta_len]))
+    event["delta"] = base64.b64encode(payload[META_LEN.size + meta_len :]).decode("ascii")
+    return event
+
+
+def info(path):
+    # Record counts, bytes and duration per kind
+    log = CaptureLog(path)
+    counts, sizes, end = {}, {}, 0.0
+    for ts, kind, payload in log:
+        name = KIND_NAMES.get(kind, str(kind))
+        counts[name] = counts.get(name, 0) + 1
+        sizes[name] = sizes.get(name, 0) + len(payload)
+        end = ts
+    del payload  # Views into the map must be gone before it is closed
+    log.close()
+    return {"seconds": round(end, 3), "records": counts, "bytes": sizes}
+
+
+class _ReplayRecall:
+    # Stands in for RecallAI: counts uploads instead of playing them
+    def __init__(self, paced):
+        self.id = "replay"
+        self.paced = paced
+        self.uploads = 0
+        self.chats = 0
+
+    async def output_audio(self, mp3_b64):
+        self.uploads += 1
+        # A None result keeps the playback scheduler from pacing (full-speed replay)
+        return {} if self.paced else None
+
+    async def stop_audio(self):
+        return "", 200
+
+    async def send_chat_message(self, message, to_speaker=None):
+        self.chats += 1
+        return {}
+
+    async def get_meeting_participants(self):
+        return []
+
+    async def remove(self):
+        return {}
+
+
+class _ReplayRealtime:
+    # Stands in for the OpenAI socket: server events come from the log instead
+    def __init__(self):
+        self.appends = 0
+        self.bytes_sent = 0
+
+    async def send_audio_pcm(self, pcm):
+        self.appends += 1
+        self.bytes_sent += len(pcm)
+
+    async def send_event(self, event):
+        pass
+
+    async def receive_messages(self, handler):
+        pass
+
+    async def close(self):
+        pass
+
+
+async def replay(path, speed=1.0):
+    """
+    Feed a capture log through a real MeetingSession (VAD gate, ingress
+    queue, egress segmenter, encoder worker pool, playback scheduler) with
+    Recall and OpenAI replaced by stand-ins. ``speed`` scales the original
+    timing; 0 replays as fast as possible.
+    """
+    from api import encode_segment
+    from sessions import MeetingSession
+
+    recall = _ReplayRecall(paced=speed > 0)
+    realtime = _ReplayRealtime()
+    session = MeetingSession(recall, encode=encode_segment)
+    session.realtime = realtime
+    session.transcripts = None  # Never write replayed text into the real store
+    if speed == 0:
+        # Send meeting audio as soon as it is queued instead of coalescing on a timer
+        session.ingress.coalesce = 0
+    await session.connect()
+
+    loop = asyncio.get_running_loop()
+    log = CaptureLog(path)
+    start = loop.time()
+    lag = 0.0
+    records = 0
+    for ts, kind, payload in log:
+        if speed > 0:
+            delay = start + ts / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                lag = max(lag, -delay)
+        if kind == INGRESS:
+            if speed == 0:
+                # Full speed, but never faster than the ingress queue drains (no drops)
+                while len(session.ingress) + len(payload) > session.ingress.max_queue_bytes:
+                    await asyncio.sleep(0)
+            session.push_audio(bytes(payload))
+        else:
+            await session.handle_message(decode_event(kind, payload))
+        records += 1
+    # Let queued audio, encodes and uploads drain
+    while (
+        len(session.ingress)
+        or session.egress.pending
+        or session.jobs.pending
+        or session.playback.busy
+    ):
+        await asyncio.sleep(0.01)
+    wall = loop.time() - start
+    del payload  # Views into the map must be gone before it is closed
+    log.close()
+    await session.close()
+    return {
+        "records": records,
+        "wall_seconds": round(wall, 3),
+        "max_behind_seconds": round(lag, 3),
+        "upstream_appends": realtime.appends,
+        "upstream_bytes": realtime.bytes_sent,
+        "recall_uploads": recall.uploads,
+        "chat_messages": recall.chats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a session capture log.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("info", help="summarise a capture log")
+    show.add_argument("path")
+    run = commands.add_parser("replay", help="feed a capture log through the session pipeline")
+    run.add_argument("path")
+    run.add_argument("--speed", type=float, default=1.0, help="1 = original timing, 0 = max")
+    args = parser.parse_args()
+    os.environ.setdefault("TRANSCRIPT_DB", "")  # Replays keep no transcripts
+
+    if args.command == "info":
+        result = info(args.path)
+    else:
+        result = asyncio.run(replay(args.path, args.speed))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import asyncio
+import inspect
+import os
+import re
+
+from logs import get_logger
+
+log = get_logger("chat")
+
+MAX_CHAT_CHARS = 4000
+
+# Sentence-ending punctuation followed by whitespace (or the end of the text so far)
+_SENTENCE_END = re.compile(r"[.?!](?=\s|$)")
+
+
+def output_mode():
+    # audio (default): answers are spoken. chat: answers are posted to the meeting
+    # chat and no audio is generated or encoded. both: chat first, audio alongside.
+    return os.getenv("OUTPUT_MODE", "audio")
+
+
+def chat_to():
+    # Who sees the chat messages: "everyone", or a participant id to reach only the agent
+    return os.getenv("CHAT_TO", "everyone")
+
+
+def chat_enabled():
+    return output_mode() in ("chat", "both")
+
+
+def audio_enabled():
+    return output_mode() != "chat"
+
+
+def modalities():
+    # Response modalities to request from the Realtime API
+    return ["text"] if output_mode() == "chat" else ["audio", "text"]
+
+
+class ChatRelay:
+    """
+    Streams an answer into the meeting chat while it is being generated.
+
+    Text deltas are buffered. Once a sentence is complete, a flush is
+    scheduled ``debounce_ms`` later, so sentences that finish close together
+    share one message; ``finish()`` sends the rest at the end of the answer.
+    ``send(text)`` posts one chat message and may be async; messages are
+    sent one at a time, in order.
+    """
+
+    def __init__(self, send, debounce_ms=None, max_chars=MAX_CHAT_CHARS):
+        if debounce_ms is None:
+            # Sentences completed within this window are sent as one message
+            debounce_ms = int(os.getenv("CHAT_DEBOUNCE_MS", "400"))
+        self.send = send
+        self.debounce = debounce_ms / 1000
+        self.max_chars = max_chars
+        self.messages = 0
+        self._text = ""  # Received but not sent yet
+        self._flush_task = None
+        self._posts = set()  # finish() sends, cancelled by close()
+        self._lock = asyncio.Lock()
+
+    def _complete(self):
+        # Length of the buffered text up to the end of its last full sentence
+        end = 0
+        for match in _SENTENCE_END.finditer(self._text):
+            end = match.end()
+        return end
+
+    def delta(self, text):
+        # Called for every response.text.delta / response.audio_transcript.delta
+        if not text:
+            return
+        self._text += text
+        if self._flush_task is None and self._complete():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.debounce)
+        self._flush_task = None
+        end = self._complete()
+        if end:
+            text, self._text = self._text[:end], self._text[end:]
+            await self._post(text)
+
+    def finish(self):
+        # End of the answer: send whatever has not been sent yet
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        text, self._text = self._text, ""
+        if text.strip():
+            task = asyncio.create_task(self._post(text))
+            self._posts.add(task)
+            task.add_done_callback(self._post_done)
+
+    def _post_done(self, task):
+        self._posts.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("chat_post_failed", error=repr(task.exception()))
+
+    async def _post(self, text):
+        text = text.strip()
+        async with self._lock:
+            for start in range(0, len(text), self.max_chars):
+                try:
+                    result = self.send(text[start : start + self.max_chars])
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    log.error("chat_send_failed", error=e)
+                    return
+                self.messages += 1
+
+    def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for task in list(self._posts):
+            task.cancel()
+        self._text = ""
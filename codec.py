@@ -0,0 +1,98 @@
+import base64
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+
+else:
+    loads = json.loads
+    dumps = json.dumps
+
+# High-volume events are recognised by scanning for these, not by parsing
+RECALL_AUDIO_EVENT = '"audio_mixed_raw.data"'
+RECALL_SEPARATE_AUDIO_EVENT = '"audio_separate_raw.data"'
+AUDIO_DELTA_EVENT = '"response.audio.delta"'
+_BUFFER_KEY = re.compile(r'"buffer"\s*:\s*"')
+_DELTA_KEY = re.compile(r'"delta"\s*:\s*"')
+
+# Outgoing input_audio_buffer.append is built from a prebuilt template
+_APPEND_PREFIX = b'{"type":"input_audio_buffer.append","audio":"'
+_APPEND_SUFFIX = b'"}'
+
+
+def _string_value(raw, key_pattern):
+    # Return (start, end) of the string value after key_pattern, or None.
+    # Base64 never needs JSON escapes; anything escaped takes the slow path.
+    match = key_pattern.search(raw)
+    if match is None:
+        return None
+    start = match.end()
+    end = raw.find('"', start)
+    if end < 0 or "\\" in raw[start:end]:
+        return None
+    return start, end
+
+
+def recall_audio_b64(raw):
+    """
+    Return the base64 PCM buffer of a Recall ``audio_mixed_raw.data`` event,
+    or None for any other event. Avoids parsing the envelope.
+    """
+    if RECALL_AUDIO_EVENT not in raw:
+        return None
+    span = _string_value(raw, _BUFFER_KEY)
+    if span is not None:
+        return raw[span[0] : span[1]]
+    event = loads(raw)
+    if event.get("event") != "audio_mixed_raw.data":
+        return None
+    return event["data"]["data"]["buffer"]
+
+
+def recall_separate_audio(raw):
+    """
+    Split a Recall ``audio_separate_raw.data`` event into (event, base64
+    buffer), or return None for any other event. The buffer is sliced out
+    and only the small rest (participant, bot) goes through the JSON parser;
+    the returned event has no "buffer".
+    """
+    if RECALL_SEPARATE_AUDIO_EVENT not in raw:
+        return None
+    span = _string_value(raw, _BUFFER_KEY)
+    if span is not None:
+        return loads(raw[: span[0]] + raw[span[1] :]), raw[span[0] : span[1]]
+    event = loads(raw)
+    if event.get("event") != "audio_separate_raw.data":
+        return None
+    return event, event["data"]["data"].pop("buffer", "")
+
+
+def parse_server_event(raw):
+    """
+    Parse an OpenAI realtime server event.
+
+    ``response.audio.delta`` events are parsed without their (large) delta:
+    the base64 string is sliced out of the frame and only the small remainder
+    goes through the JSON parser. Everything else is parsed normally.
+    """
+    if AUDIO_DELTA_EVENT in raw[:64]:
+        span = _string_value(raw, _DELTA_KEY)
+        if span is not None:
+            event = loads(raw[: span[0]] + raw[span[1] :])
+            event["delta"] = raw[span[0] : span[1]]
+            return event
+    return loads(raw)
+
+
+def append_message(pcm):
+    """Build an ``input_audio_buffer.append`` message for raw audio bytes (PCM16 or mu-law)."""
+    return (_APPEND_PREFIX + base64.b64encode(pcm) + _APPEND_SUFFIX).decode("ascii")
@@ -0,0 +1,196 @@
+import os
+import time
+
+from metrics import CONTEXT_ITEMS_DELETED
+
+SUMMARY_CHARS = 2000
+LINE_CHARS = 300
+
+SUMMARY_PREFIX = "ctx_summary_"
+
+
+def context_max_tokens():
+    # Compact the server-side conversation once a response's input exceeds this
+    # many tokens (0: no token budget; off unless set)
+    return int(os.getenv("CONTEXT_MAX_TOKENS", "0"))
+
+
+def context_max_minutes():
+    # ... or once items are older than this many minutes (0: no age limit)
+    return float(os.getenv("CONTEXT_MAX_MINUTES", "0"))
+
+
+def compaction_enabled():
+    return context_max_tokens() > 0 or context_max_minutes() > 0
+
+
+class ContextCompactor:
+    """
+    Keeps the realtime conversation bounded in a long meeting.
+
+    Conversation items are tracked from server events (ids in order, role
+    and transcript). When a response's input grows past ``max_tokens``, or
+    items get older than ``max_minutes``, everything but the last
+    ``keep_items`` is deleted with conversation.item.delete and replaced by
+    one system message at the start of the conversation: a rolling digest
+    of what was said, newest last, capped at SUMMARY_CHARS. The session
+    instructions are not conversation items and are never touched.
+
+    ``send_event(event)`` sends a client event on the realtime socket.
+    """
+
+    def __init__(
+        self,
+        send_event,
+        max_tokens=None,
+        max_minutes=None,
+        keep_items=None,
+    ):
+        self.send_event = send_event
+        self.max_tokens = context_max_tokens() if max_tokens is None else max_tokens
+        self.max_age = (context_max_minutes() if max_minutes is None else max_minutes) * 60
+        # The most recent items are never compacted
+        self.keep_items = (
+            int(os.getenv("CONTEXT_KEEP_ITEMS", "8")) if keep_items is None else keep_items
+        )
+        self.input_tokens = 0  # Input tokens of the last response
+        self.compactions = 0
+        self.deleted = 0
+        self.summary = ""
+        self._items = []  # [{"id", "type", "role", "text", "created"}] oldest first
+        self._summary_id = None
+
+    def _find(self, item_id):
+        for item in self._items:
+            if item["id"] == item_id:
+                return item
+        return None
+
+    def _set_text(self, item_id, text):
+        item = self._find(item_id)
+        if item is not None and text:
+            item["text"] = text.strip()
+
+    def observe(self, event):
+        """
+        Track one server event. Returns True when the conversation is over
+        budget and ``compact()`` should run.
+        """
+        kind = event.get("type")
+        if kind == "conversation.item.created":
+            item = event.get("item") or {}
+            if item.get("id") and not item["id"].startswith(SUMMARY_PREFIX):
+                self._items.append(
+                    {
+                        "id": item["id"],
+                        "type": item.get("type"),
+                        "role": item.get("role"),
+                        "text": "",
+                        "created": time.monotonic(),
+                    }
+                )
+        elif kind == "conversation.item.input_audio_transcription.completed":
+            self._set_text(event.get("item_id"), event.get("transcript"))
+        elif kind == "response.audio_transcript.done":
+            self._set_text(event.get("item_id"), event.get("transcript"))
+        elif kind == "response.text.done":
+            self._set_text(event.get("item_id"), event.get("text"))
+        elif kind == "conversation.item.deleted":
+            self._items = [i for i in self._items if i["id"] != event.get("item_id")]
+        elif kind == "response.done":
+            usage = (event.get("response") or {}).get("usage") or {}
+            self.input_tokens = usage.get("input_tokens", self.input_tokens)
+            return self.over_budget()
+        return False
+
+    def over_budget(self):
+        if len(self._items) <= self.keep_items:
+            return False
+        if self.max_tokens and self.input_tokens > self.max_tokens:
+            return True
+        oldest = self._items[0]["created"]
+        return bool(self.max_age) and time.monotonic() - oldest > self.max_age
+
+    def _cut(self):
+        # Number of leading items to compact
+        cut = len(self._items) - self.keep_items
+        if not (self.max_tokens and self.input_tokens > self.max_tokens):
+            # Age budget only: just the items past it
+            limit = time.monotonic() - self.max_age
+            cut = min(cut, sum(1 for i in self._items if i["created"] < limit))
+        # A function call and its output go together
+        while cut < len(self._items) and self._items[cut]["type"] == "function_call_output":
+            cut += 1
+        return max(cut, 0)
+
+    def _digest(self, items):
+        # Rolling summary: earlier digest plus one line per transcribed message
+        lines = [self.summary] if self.summary else []
+        for item in items:
+            if item["type"] == "message" and item["text"]:
+                speaker = "Assistant" if item["role"] == "assistant" else "Participant"
+                text = item["text"]
+                if len(text) > LINE_CHARS:
+                    text = text[:LINE_CHARS] + "..."
+                lines.append(f"{speaker}: {text}")
+        summary = "\n".join(lines)
+        if len(summary) > SUMMARY_CHARS:
+            summary = "..." + summary[-SUMMARY_CHARS:].split("\n", 1)[-1]
+        return summary
+
+    async def compact(self):
+        """Replace the oldest items with the rolling summary; returns items deleted."""
+        cut = self._cut()
+        if cut <= 0:
+            return 0
+        old, self._items = self._items[:cut], self._items[cut:]
+        self.summary = self._digest(old)
+        previous_summary = self._summary_id
+        self.compactions += 1
+        events = []
+        if self.summary:
+            # The new digest includes the previous one, which is deleted below
+            self._summary_id = f"{SUMMARY_PREFIX}{self.compactions}"
+            events.append(
+                {
+                    "type": "conversation.item.create",
+                    "previous_item_id": "root",
+                    "item": {
+                        "id": self._summary_id,
+                        "type": "message",
+                        "role": "system",
+                        "content": [
+                            {
+                                "type": "input_text",
+                                "text": "Summary of the earlier part of this meeting:\n"
+                                + self.summary,
+                            }
+                        ],
+                    },
+                }
+            )
+            if previous_summary is not None:
+                old.append({"id": previous_summary})
+        for item in old:
+            events.append({"type": "conversation.item.delete", "item_id": item["id"]})
+        for event in events:
+            await self.send_event(event)
+        self.deleted += len(old)
+        CONTEXT_ITEMS_DELETED.inc(len(old))
+        self.input_tokens = 0  # Re-measured on the next response.done
+        return len(old)
+
+    def reset(self):
+        # The realtime socket reconnected: a new connection starts with an empty
+        # conversation, so the tracked item ids (and the summary item) are gone
+        self.input_tokens = 0
+        self.summary = ""
+        self._items = []
+        self._summary_id = None
+
+    def stats(self):
+        return {
+            "context_items": len(self._items),
+            "context_compactions": self.compactions,
+            "context_items_deleted": self.deleted,
+        }
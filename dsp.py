@@ -0,0 +1,130 @@
+import math
+import os
+
+import numpy as np
+
+from vad import MEETING_SAMPLE_RATE
+
+# Wire formats the Realtime API accepts for input_audio_buffer.append
+PCM16 = "pcm16"  # 24 kHz mono PCM16, little-endian
+G711_ULAW = "g711_ulaw"  # 8 kHz mono G.711 mu-law, one byte per sample
+WIRE_RATES = {PCM16: 24000, G711_ULAW: 8000}
+
+
+def input_audio_format():
+    # Format of the meeting audio sent to OpenAI (see IngressCodec)
+    return os.getenv("INPUT_AUDIO_FORMAT", PCM16)
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (up by L, low-pass, down by M) for mono
+    PCM16, evaluated only at the output samples, one polyphase branch each.
+
+    The filter is a Kaiser-windowed sinc with ``taps_per_phase`` taps per
+    branch, cut off just below the lower Nyquist rate. The last input
+    samples are kept between calls, so a stream can be fed in frames of
+    any size and comes out exactly as if it had been resampled in one go.
+    """
+
+    def __init__(self, in_rate, out_rate, taps_per_phase=24, beta=8.0):
+        g = math.gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.taps = taps_per_phase
+        n = self.up * taps_per_phase
+        # Cutoff as a fraction of the upsampled rate's Nyquist frequency
+        cutoff = 0.9 * min(1.0 / self.up, 1.0 / self.down)
+        t = np.arange(n) - (n - 1) / 2
+        h = cutoff * np.sinc(cutoff * t) * np.kaiser(n, beta) * self.up
+        # _phases[p, j] = h[p + j * up]: the taps that meet input x[k - j] on branch p
+        self._phases = h.reshape(taps_per_phase, self.up).T.astype(np.float32)
+        # Branch taps in input order (oldest sample first), for the window dot products
+        self._reversed = np.ascontiguousarray(self._phases[:, ::-1])
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._inputs = 0  # input samples seen so far
+        self._outputs = 0  # output samples produced so far
+
+    def process(self, pcm):
+        """Resample the next chunk of PCM16 bytes; returns int16 samples."""
+        x = np.frombuffer(pcm, dtype="<i2")
+        if self.up == self.down:
+            return x
+        buffer = np.concatenate((self._history, x.astype(np.float32)))
+        first_input = self._inputs - (self.taps - 1)  # stream index of buffer[0]
+        self._inputs += len(x)
+        end = (self._inputs * self.up + self.down - 1) // self.down
+        n = np.arange(self._outputs, end, dtype=np.int64)
+        self._outputs = end
+        self._history = buffer[len(buffer) - (self.taps - 1) :]
+        if len(n) == 0:
+            return np.zeros(0, dtype="<i2")
+        # Outputs n, n + up, n + 2 * up, ... share a branch and step `down`
+        # inputs apart, so each branch is one strided dot product
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps)
+        y = np.empty(len(n), dtype=np.float32)
+        for i in range(min(self.up, len(n))):
+            position = int(n[i]) * self.down
+            start = position // self.up - first_input - (self.taps - 1)
+            count = len(range(i, len(n), self.up))
+            rows = windows[start : start + count * self.down : self.down]
+            y[i :: self.up] = rows @ self._reversed[position % self.up]
+        return np.clip(np.rint(y), -32768, 32767).astype("<i2")
+
+
+def _ulaw_table():
+    # mu-law byte for every 16-bit sample, indexed by the sample's uint16 bits
+    # (ITU-T G.711 on the top 14 bits, same codes as the stdlib's audioop)
+    x = np.arange(65536, dtype=np.int64)
+    x = np.where(x >= 32768, x - 65536, x) >> 2
+    mask = np.where(x < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(x), 8159) + 0x21
+    segment = np.searchsorted(
+        np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude
+    )
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    code = np.where(segment > 7, 0x7F, code)  # Clipped: loudest code
+    return (code ^ mask).astype(np.uint8)
+
+
+ULAW_TABLE = _ulaw_table()
+
+
+def ulaw_encode(samples):
+    """G.711 mu-law encode int16 samples (one table lookup per sample)."""
+    return ULAW_TABLE[np.asarray(samples, dtype="<i2").view(np.uint16)].tobytes()
+
+
+def ulaw_decode(data):
+    # int16 samples of mu-law bytes
+    u = ~np.frombuffer(data, dtype=np.uint8).astype(np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    magnitude = (((u & 0x0F) << 3) + 0x84) << exponent
+    return np.where(u & 0x80, 0x84 - magnitude, magnitude - 0x84).astype("<i2")
+
+
+class IngressCodec:
+    """
+    Converts meeting audio (16 kHz PCM16 from Recall) into the format
+    declared as ``input_audio_format`` in session.update: 24 kHz PCM16, or
+    8 kHz G.711 mu-law, a sixth of the bytes. The resampler
+    keeps its state across calls, so feed one session's audio in order.
+    """
+
+    def __init__(self, input_format=None, in_rate=MEETING_SAMPLE_RATE):
+        self.input_audio_format = input_format or input_audio_format()
+        if self.input_audio_format not in WIRE_RATES:
+            raise ValueError(f"Unsupported input_audio_format: {self.input_audio_format}")
+        self.resampler = PolyphaseResampler(in_rate, WIRE_RATES[self.input_audio_format])
+
+    def encode(self, pcm):
+        # Wire bytes for one chunk of meeting PCM16
+        samples = self.resampler.process(pcm)
+        if self.input_audio_format == G711_ULAW:
+            return ulaw_encode(samples)
+        return samples.tobytes()
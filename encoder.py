@@ -0,0 +1,71 @@
+import base64
+import io
+import os
+
+import numpy as np
+
+try:
+    import lameenc
+except ImportError:  # pydub + ffmpeg fallback
+    lameenc = None
+
+
+def resample(pcm, in_rate, out_rate):
+    """
+    Resample mono PCM16 bytes from in_rate to out_rate in one vectorized pass
+    (linear interpolation, same quality class as pydub's set_frame_rate).
+    """
+    samples = np.frombuffer(pcm, dtype="<i2")
+    if in_rate == out_rate or len(samples) == 0:
+        return samples
+    n_out = int(len(samples) * out_rate / in_rate)
+    positions = np.arange(n_out) * (in_rate / out_rate)
+    out = np.interp(positions, np.arange(len(samples)), samples)
+    return np.clip(np.rint(out), -32768, 32767).astype("<i2")
+
+
+class Mp3Encoder:
+    """
+    PCM16 mono -> MP3 encoder.
+
+    Uses the in-process LAME binding (lameenc) when it is installed, so no
+    ffmpeg process is forked per utterance, and falls back to pydub otherwise.
+    Set MP3_ENCODER=pydub to force the fallback.
+    """
+
+    def __init__(self, sample_rate, bitrate=64, backend=None):
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        backend = backend or os.getenv("MP3_ENCODER", "lame")
+        if backend == "lame" and lameenc is None:
+            backend = "pydub"
+        self.backend = backend
+
+    def encode(self, pcm):
+        # Returns raw MP3 bytes
+        if self.backend == "lame":
+            return self._encode_lame(pcm)
+        return self._encode_pydub(pcm)
+
+    def encode_b64(self, pcm):
+        return base64.b64encode(self.encode(pcm)).decode("utf-8")
+
+    def _encode_lame(self, pcm):
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(self.bitrate)
+        encoder.set_in_sample_rate(self.sample_rate)
+        encoder.set_channels(1)
+        encoder.set_quality(7)  # 2 = best, 7 = fastest
+        # lameenc only takes immutable bytes; memoryview/ndarray input is copied once here
+        mp3 = encoder.encode(pcm if isinstance(pcm, bytes) else bytes(pcm))
+        return mp3 + encoder.flush()
+
+    def _encode_pydub(self, pcm):
+        from pydub import AudioSegment
+
+        audio = AudioSegment(
+            data=bytes(pcm), sample_width=2, frame_rate=self.sample_rate, channels=1
+        )
+        buf = io.BytesIO()
+        audio.export(buf, format="mp3", bitrate=f"{self.bitrate}k")
+        return buf.getvalue()
@@ -0,0 +1,137 @@
+import asyncio
+import collections
+import inspect
+import os
+
+from logs import get_logger
+from metrics import INGRESS_DROPPED_BYTES
+from vad import MEETING_SAMPLE_RATE
+
+log = get_logger("ingress")
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class IngressQueue:
+    """
+    Bounded queue between the Recall receive loop and the OpenAI websocket.
+
+    ``put`` never waits: the receive loop hands over PCM16 frames and goes
+    straight back to reading. A dedicated sender task waits ``coalesce_ms``
+    after the first queued frame, joins everything that arrived meanwhile
+    (up to ``max_message_ms`` of audio) and passes it to ``send(pcm)`` as one
+    ``input_audio_buffer.append``. While the socket is slow, frames pile up
+    and later messages simply get bigger.
+
+    At most ``max_queue_ms`` of audio is held. On overflow the policy decides
+    what goes: ``drop_oldest`` (default) keeps the most recent audio, which is
+    what a live conversation needs; ``drop_newest`` keeps what is already
+    queued. Dropped audio is counted in ``dropped_bytes`` (and the
+    ingress_dropped_bytes_total metric).
+    """
+
+    def __init__(
+        self,
+        send,
+        sample_rate=MEETING_SAMPLE_RATE,
+        coalesce_ms=None,
+        max_message_ms=500,
+        max_queue_ms=2000,
+        overflow=None,
+    ):
+        self.send = send
+        bytes_per_ms = sample_rate * 2 // 1000
+        if coalesce_ms is None:
+            coalesce_ms = int(os.getenv("INGRESS_COALESCE_MS", "60"))
+        self.coalesce = max(0, coalesce_ms) / 1000
+        self.max_message_bytes = max_message_ms * bytes_per_ms
+        self.max_queue_bytes = max_queue_ms * bytes_per_ms
+        self.overflow = overflow or os.getenv("INGRESS_OVERFLOW", DROP_OLDEST)
+        if self.overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown ingress overflow policy: {self.overflow}")
+
+        self._frames = collections.deque()
+        self._bytes = 0
+        self._ready = asyncio.Event()
+        self._task = None
+
+        self.frames_in = 0
+        self.messages_out = 0
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        # Bytes of audio waiting to be sent
+        return self._bytes
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def put(self, pcm):
+        """Queue one PCM16 frame without waiting; applies the overflow policy."""
+        if not pcm:
+            return
+        self.frames_in += 1
+        size = len(pcm)
+        if self._bytes + size > self.max_queue_bytes:
+            if self.overflow == DROP_NEWEST:
+                self.dropped_bytes += size
+                INGRESS_DROPPED_BYTES.inc(size)
+                return
+            while self._frames and self._bytes + size > self.max_queue_bytes:
+                dropped = self._frames.popleft()
+                self._bytes -= len(dropped)
+                self.dropped_bytes += len(dropped)
+                INGRESS_DROPPED_BYTES.inc(len(dropped))
+        self._frames.append(pcm)
+        self._bytes += size
+        self._ready.set()
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _take(self):
+        # Pop up to max_message_bytes of queued frames
+        chunks = []
+        size = 0
+        while self._frames and (
+            not chunks or size + len(self._frames[0]) <= self.max_message_bytes
+        ):
+            frame = self._frames.popleft()
+            chunks.append(frame)
+            size += len(frame)
+        self._bytes -= size
+        if not self._frames:
+            self._ready.clear()
+        return b"".join(chunks)
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            if self.coalesce and self._bytes < self.max_message_bytes:
+                # Let more frames arrive so they share one message
+                await asyncio.sleep(self.coalesce)
+            pcm = self._take()
+            try:
+                result = self.send(pcm)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                log.error("ingress_send_failed", bytes=len(pcm), error=e)
+                continue
+            self.messages_out += 1
+
+    def stats(self):
+        return {
+            "frames_in": self.frames_in,
+            "messages_out": self.messages_out,
+            "queued_bytes": self._bytes,
+            "dropped_bytes": self.dropped_bytes,
+        }
@@ -0,0 +1,308 @@
+"""
+Local knowledge base for the assistant: product docs, pricing, FAQs.
+
+Build the index offline from a folder of Markdown/text files:
+
+    python knowledge.py build docs/ --out kb_index
+
+and point KNOWLEDGE_BASE at it (default ``kb_index``). The model can then
+call the ``search_knowledge_base`` tool during a meeting.
+"""
+import argparse
+import collections
+import inspect
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+# Tokens are hashed into this many buckets (the hashing trick keeps the
+# index a handful of flat arrays, with no vocabulary to load)
+DIM = 1 << 18
+CHUNK_CHARS = 1000
+TOP_K = 3
+
+TOOL_NAME = "search_knowledge_base"
+TOOL = {
+    "type": "function",
+    "name": TOOL_NAME,
+    "description": (
+        "Search the company's product documentation, pricing and FAQs. "
+        "Use it whenever a question is about product features, prices, plans or policies."
+    ),
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "What to look up, in a few keywords"}
+        },
+        "required": ["query"],
+    },
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or our "
+    "that the this to we what when where which who why will with you your".split()
+)
+
+_kb = None
+
+
+def knowledge_base_path():
+    # Directory of the built index (KNOWLEDGE_BASE)
+    return os.getenv("KNOWLEDGE_BASE", "kb_index")
+
+
+def tokenize(text):
+    # Lowercase words without stopwords; plural "s" is dropped so "plans" finds "plan"
+    return [
+        w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+        for w in _WORD.findall(text.lower())
+        if w not in _STOPWORDS
+    ]
+
+
+def _bucket(token):
+    return zlib.crc32(token.encode("utf-8")) & (DIM - 1)
+
+
+def iter_chunks(root):
+    # (source, text) pieces of every .md/.txt file, split at paragraph boundaries
+    for dirpath, _, filenames in sorted(os.walk(root)):
+        for filename in sorted(filenames):
+            if not filename.endswith((".md", ".txt")):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, encoding="utf-8") as f:
+                paragraphs = [p.strip() for p in f.read().split("\n\n") if p.strip()]
+            source = os.path.relpath(path, root)
+            chunk = ""
+            for paragraph in paragraphs:
+                if chunk and len(chunk) + len(paragraph) > CHUNK_CHARS:
+                    yield source, chunk
+                    chunk = ""
+                chunk = f"{chunk}\n\n{paragraph}" if chunk else paragraph
+            if chunk:
+                yield source, chunk
+
+
+def build_index(root, out, k1=1.2, b=0.75):
+    """
+    Build a BM25 index over the docs in ``root`` into the directory ``out``.
+
+    Postings are stored bucket by bucket (CSR layout) with the full BM25
+    weight of each (bucket, chunk) pair precomputed, so a query is a few
+    array slices and one bincount.
+    """
+    chunks = list(iter_chunks(root))
+    if not chunks:
+        raise ValueError(f"No .md or .txt documents under {root}")
+    buckets, docs, tfs, lengths = [], [], [], []
+    for i, (_, text) in enumerate(chunks):
+        counts = collections.Counter(_bucket(t) for t in tokenize(text))
+        lengths.append(sum(counts.values()))
+        for bucket, tf in counts.items():
+            buckets.append(bucket)
+            docs.append(i)
+            tfs.append(tf)
+    buckets = np.array(buckets, dtype=np.int64)
+    docs = np.array(docs, dtype=np.int32)
+    tfs = np.array(tfs, dtype=np.float32)
+    lengths = np.array(lengths, dtype=np.float32)
+
+    order = np.lexsort((docs, buckets))
+    buckets, docs, tfs = buckets[order], docs[order], tfs[order]
+    df = np.bincount(buckets, minlength=DIM)
+    n = len(chunks)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+    norm = k1 * (1 - b + b * lengths[docs] / max(lengths.mean(), 1.0))
+    weights = idf[buckets] * tfs * (k1 + 1) / (tfs + norm)
+    pointers = np.zeros(DIM + 1, dtype=np.int64)
+    pointers[1:] = np.cumsum(df)
+
+    texts = [text.encode("utf-8") for _, text in chunks]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t) for t in texts])
+
+    os.makedirs(out, exist_ok=True)
+    np.save(os.path.join(out, "pointers.npy"), pointers)
+    np.save(os.path.join(out, "docs.npy"), docs)
+    np.save(os.path.join(out, "weights.npy"), weights.astype(np.float32))
+    np.save(os.path.join(out, "offsets.npy"), offsets)
+    with open(os.path.join(out, "text.bin"), "wb") as f:
+        f.write(b"".join(texts))
+    with open(os.path.join(out, "meta.json"), "w") as f:
+        json.dump({"dim": DIM, "chunks": n, "sources": [s for s, _ in chunks]}, f)
+    return n
+
+
+class KnowledgeBase:
+    """
+    Read side of an index built by ``build_index``. Arrays and chunk text are
+    memory-mapped, so opening is instant and the OS shares the pages between
+    processes.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["dim"] != DIM:
+            raise ValueError(f"{path} was built with dim={meta['dim']}; rebuild it")
+        self.sources = meta["sources"]
+        self.size = meta["chunks"]
+        self.pointers = np.load(os.path.join(path, "pointers.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r")
+        self.weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.text = np.memmap(os.path.join(path, "text.bin"), dtype=np.uint8, mode="r")
+
+    def search(self, query, k=TOP_K):
+        # Top-k chunks by BM25 score, as [{"source", "text", "score"}]
+        buckets = sorted({_bucket(t) for t in tokenize(query)})
+        if not buckets:
+            return []
+        spans = [(self.pointers[h], self.pointers[h + 1]) for h in buckets]
+        docs = np.concatenate([self.docs[s:e] for s, e in spans])
+        if len(docs) == 0:
+            return []
+        weights = np.concatenate([self.weights[s:e] for s, e in spans])
+        scores = np.bincount(docs, weights=weights, minlength=self.size)
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            if scores[i] <= 0:
+                break
+            start, end = self.offsets[i], self.offsets[i + 1]
+            results.append(
+                {
+                    "source": self.sources[i],
+                    "text": self.text[start:end].tobytes().decode("utf-8"),
+                    "score": round(float(scores[i]), 3),
+                }
+            )
+        return results
+
+
+def get_knowledge_base():
+    # The process-wide index, or None if KNOWLEDGE_BASE has not been built
+    global _kb
+    path = knowledge_base_path()
+    if _kb is None and path and os.path.exists(os.path.join(path, "meta.json")):
+        _kb = KnowledgeBase(path)
+    return _kb
+
+
+class KnowledgeTool:
+    """
+    Answers ``search_knowledge_base`` function calls for one meeting.
+
+    Results are cached per meeting by normalised query, so a question asked
+    again (or rephrased with the same keywords) does not hit the index.
+    ``send_event(event)`` sends a client event on the realtime socket.
+    """
+
+    def __init__(self, kb, send_event, cache_size=128):
+        self.kb = kb
+        self.send_event = send_event
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()
+        self._pending = {}  # response id -> call ids answered while it was active
+
+    @classmethod
+    def for_meeting(cls, send_event):
+        # None when no knowledge base is configured
+        kb = get_knowledge_base()
+        return cls(kb, send_event) if kb is not None else None
+
+    def lookup(self, query):
+        # JSON tool output for a query, from the meeting cache when possible
+        key = " ".join(sorted(set(tokenize(query))))
+        output = self._cache.get(key)
+        if output is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return output
+        self.misses += 1
+        output = json.dumps({"results": self.kb.search(query)})
+        self._cache[key] = output
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return output
+
+    async def _send(self, event):
+        result = self.send_event(event)
+        if inspect.isawaitable(result):
+            await result
+
+    async def handle(self, event):
+        """
+        Answer a ``response.function_call_arguments.done`` event for our tool.
+        Returns False for any other call.
+
+        The response that made the call is still active here, so the model
+        is only asked to continue on that response's ``response.done``.
+        """
+        if event.get("name") != TOOL_NAME:
+            return False
+        try:
+            query = json.loads(event.get("arguments") or "{}").get("query", "")
+        except ValueError:
+            query = ""
+        output = self.lookup(query) if query else json.dumps({"results": []})
+        await self._send(
+            {
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "function_call_output",
+                    "call_id": event.get("call_id"),
+                    "output": output,
+                },
+            }
+        )
+        self._pending.setdefault(event.get("response_id"), []).append(event.get("call_id"))
+        return True
+
+    async def response_done(self, event):
+        """
+        On ``response.done``: if that response called the tool, send
+        response.create so the model speaks the result. Returns True if it did.
+        A cancelled response (someone talked over the bot) is not continued;
+        the outputs stay in the conversation for the next turn.
+        """
+        response = event.get("response") or {}
+        calls = self._pending.pop(response.get("id"), None)
+        if calls is None and None in self._pending:
+            calls = self._pending.pop(None)  # Arguments event without a response_id
+        if not calls or response.get("status") == "cancelled":
+            return False
+        await self._send({"type": "response.create"})
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the local knowledge base.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a folder of .md/.txt documents")
+    build.add_argument("docs")
+    build.add_argument("--out", default=knowledge_base_path())
+    query = commands.add_parser("query", help="search a built index")
+    query.add_argument("text")
+    query.add_argument("--index", default=knowledge_base_path())
+    args = parser.parse_args()
+
+    if args.command == "build":
+        n = build_index(args.docs, args.out)
+        print(f"Indexed {n} chunks into {args.out}")
+    else:
+        for result in KnowledgeBase(args.index).search(args.text):
+            print(f"[{result['score']}] {result['source']}: {result['text'][:200]}")
+
+
+if __name__ == "__main__":
+    main()
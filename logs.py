@@ -0,0 +1,181 @@
+"""
+Structured, non-blocking logging.
+
+    log = get_logger("recallai")
+    log.info("output_audio", bot_id=bot_id, chars=len(b64), seconds=elapsed)
+
+Records go through a QueueHandler; a listener thread formats them as one
+JSON object per line and writes them to stdout, so the event loop never
+waits on stdout. A call whose level is disabled returns before anything is
+built or formatted. Per event, records can be sampled (LOG_SAMPLE) and are
+rate limited (LOG_RATE_LIMIT per second); the number suppressed is reported
+on the next record that gets through. Secrets and audio payloads are
+redacted when the record is formatted.
+
+LOG_LEVEL, LOG_RATE_LIMIT and LOG_SAMPLE are read by the first
+``get_logger`` call, so entry points load .env before importing the
+project's modules.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+# Field names whose values are never written out (only their size)
+REDACT_FIELDS = frozenset(
+    "authorization api_key headers b64_data audio buffer delta payload".split()
+)
+MAX_FIELD_CHARS = 300
+SECRET_VARS = ("RECALL_API_KEY", "OPENAI_API_KEY")
+
+ROOT = "sidekick"
+_listener = None
+
+
+def log_rate_limit():
+    # Records per second per event name; 0 disables the limit
+    return float(os.getenv("LOG_RATE_LIMIT", "20"))
+
+
+def log_sample_rates():
+    # Fraction of records kept per event, e.g. "openai_event=0.01,output_audio=0.1"
+    return {
+        name.strip(): float(rate)
+        for name, _, rate in (
+            item.partition("=") for item in os.getenv("LOG_SAMPLE", "").split(",") if "=" in item
+        )
+    }
+
+
+def redact(key, value):
+    # Value of one field as it may appear in the log
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, (dict, list, tuple)) and key.lower() in REDACT_FIELDS:
+        return f"<redacted {type(value).__name__}>"
+    if not isinstance(value, (int, float, bool, type(None))):
+        value = str(value)
+        if key.lower() in REDACT_FIELDS:
+            return f"<redacted {len(value)} chars>"
+        # Read at format time: .env may be loaded after this module is imported
+        for secret in filter(None, map(os.getenv, SECRET_VARS)):
+            value = value.replace(secret, "<redacted>")
+        if len(value) > MAX_FIELD_CHARS:
+            value = f"{value[:MAX_FIELD_CHARS]}... <{len(value)} chars>"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line: ts, level, logger, event and the record's fields
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry[key] = redact(key, value)
+        if record.exc_info:
+            entry["error"] = redact("error", self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The stock handler formats on the caller's thread; leave that to the listener
+    def prepare(self, record):
+        return record
+
+
+def _start():
+    global _listener
+    records = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(records, stream)
+    _listener.start()
+    atexit.register(stop_logging)
+    root = logging.getLogger(ROOT)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.addHandler(_QueueHandler(records))
+    root.propagate = False
+
+
+def stop_logging():
+    # Flush queued records and stop the writer thread
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class StructuredLogger:
+    """
+    ``logger.<level>(event, **fields)`` with per-event sampling and rate
+    limiting. ``sample`` overrides the LOG_SAMPLE rate for one call.
+    """
+
+    def __init__(self, logger, rate_limit=None, sample=None):
+        self.logger = logger
+        self.rate_limit = log_rate_limit() if rate_limit is None else rate_limit
+        self.sample = log_sample_rates() if sample is None else sample
+        self._windows = {}  # event -> [window start, records in window, suppressed]
+
+    def _allow(self, event, sample):
+        rate = self.sample.get(event, 1.0) if sample is None else sample
+        if rate < 1.0 and random.random() >= rate:
+            return False, 0
+        if not self.rate_limit:
+            return True, 0
+        now = time.monotonic()
+        window = self._windows.get(event)
+        if window is None or now - window[0] >= 1.0:
+            suppressed = window[2] if window is not None else 0
+            self._windows[event] = [now, 1, 0]
+            return True, suppressed
+        if window[1] >= self.rate_limit:
+            window[2] += 1
+            return False, 0
+        window[1] += 1
+        return True, 0
+
+    def log(self, level, event, sample=None, exc_info=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        allowed, suppressed = self._allow(event, sample)
+        if not allowed:
+            return
+        if suppressed:
+            fields["suppressed"] = suppressed
+        self.logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.log(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.log(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event, **fields):
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+
+def get_logger(name):
+    # A structured logger under the app's root; starts the writer thread once
+    if not logging.getLogger(ROOT).handlers:
+        _start()
+    return StructuredLogger(logging.getLogger(f"{ROOT}.{name}"))
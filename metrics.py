@@ -0,0 +1,195 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+from logs import get_logger
+
+log = get_logger("metrics")
+
+# Latency buckets from a few ms up to the length of a long answer
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0
+)
+
+TURN_LATENCY = Histogram(
+    "turn_latency_seconds",
+    "Time from the end of user speech (input_audio_buffer.speech_stopped) to each phase of the answer",
+    ["phase"],  # first_audio_delta, audio_done, first_playback, first_chat
+    buckets=LATENCY_BUCKETS,
+)
+ENCODE_SECONDS = Histogram(
+    "audio_encode_seconds",
+    "Time to encode one assistant audio segment",
+    buckets=LATENCY_BUCKETS,
+)
+RECALL_POST_SECONDS = Histogram(
+    "recall_output_audio_seconds",
+    "Duration of one Recall output_audio POST",
+    buckets=LATENCY_BUCKETS,
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop wakes up a sleeping task",
+    buckets=LATENCY_BUCKETS,
+)
+BARGE_IN_SECONDS = Histogram(
+    "barge_in_seconds",
+    "Time from input_audio_buffer.speech_started to the bot being silenced in the meeting",
+    buckets=LATENCY_BUCKETS,
+)
+OPENAI_RTT = Histogram(
+    "openai_ping_rtt_seconds",
+    "Round trip time of pings on the OpenAI realtime websockets",
+    buckets=LATENCY_BUCKETS,
+)
+OPENAI_RECONNECTS = Counter(
+    "openai_reconnects_total", "OpenAI realtime websockets re-established after a drop"
+)
+TURNS = Counter("turns_total", "User turns detected by server VAD")
+RESPONSES = Counter("responses_total", "Assistant audio responses completed")
+INGRESS_FRAMES = Counter("ingress_frames_total", "Meeting audio frames received from Recall")
+INGRESS_BYTES = Counter("ingress_bytes_total", "Meeting PCM16 bytes received from Recall")
+INGRESS_DROPPED_BYTES = Counter(
+    "ingress_dropped_bytes_total", "Meeting PCM16 bytes dropped by a full ingress queue"
+)
+RESPONSE_INPUT_TOKENS = Histogram(
+    "response_input_tokens",
+    "Input tokens (conversation context) of each realtime response, from response.done usage",
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000),
+)
+CONTEXT_ITEMS_DELETED = Counter(
+    "context_items_deleted_total", "Conversation items removed by context compaction"
+)
+WAKE_GATE_TURNS = Counter(
+    "wake_gate_turns_total",
+    "Transcribed user turns under WAKE_GATE, by whether they triggered a response",
+    ["outcome"],  # responded, avoided
+)
+SPEAKER_BYTES = Counter(
+    "speaker_audio_bytes_total",
+    "Per-participant meeting PCM16 bytes from Recall (SPEAKER_ALLOWLIST routing)",
+    ["decision"],  # forwarded, dropped
+)
+QUEUE_DEPTH = Gauge(
+    "queue_depth",
+    "Current depth of the pipeline queues, summed over sessions",
+    ["queue"],  # ingress_bytes, egress_segments, encode_jobs
+)
+SESSIONS = Gauge("sessions", "Meetings currently served by this process")
+STARTUP_SECONDS = Gauge(
+    "startup_phase_seconds",
+    "Duration of each startup phase (total: from importing the app to the first bot created)",
+    ["phase"],
+)
+
+
+class TurnTracer:
+    """
+    Per-session spans for one conversational turn, measured from the end of
+    user speech: first response.audio.delta, response.audio.done and the end
+    of the first Recall POST (the first audible word), and the first chat
+    message when answers go to the meeting chat. Encode and Recall POST
+    durations are recorded for every segment.
+    """
+
+    def __init__(self):
+        self._speech_stopped = None
+        self._first_delta = False
+        self._first_playback = False
+        self._first_chat = False
+
+    def speech_stopped(self):
+        TURNS.inc()
+        self._speech_stopped = time.perf_counter()
+        self._first_delta = False
+        self._first_playback = False
+        self._first_chat = False
+
+    def _since_speech_stopped(self, phase):
+        if self._speech_stopped is not None:
+            TURN_LATENCY.labels(phase).observe(time.perf_counter() - self._speech_stopped)
+
+    def audio_delta(self):
+        if not self._first_delta:
+            self._first_delta = True
+            self._since_speech_stopped("first_audio_delta")
+
+    def audio_done(self):
+        RESPONSES.inc()
+        self._since_speech_stopped("audio_done")
+
+    def response_done(self, event):
+        usage = (event.get("response") or {}).get("usage") or {}
+        if "input_tokens" in usage:
+            RESPONSE_INPUT_TOKENS.observe(usage["input_tokens"])
+
+    def chat_sent(self):
+        if not self._first_chat:
+            self._first_chat = True
+            self._since_speech_stopped("first_chat")
+
+    @contextmanager
+    def encode(self):
+        with ENCODE_SECONDS.time():
+            yield
+
+    @contextmanager
+    def recall_post(self):
+        with RECALL_POST_SECONDS.time():
+            yield
+        if not self._first_playback:
+            self._first_playback = True
+            self._since_speech_stopped("first_playback")
+
+
+@contextmanager
+def startup_phase(name):
+    # Time one startup step; steps may overlap when they run concurrently
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STARTUP_SECONDS.labels(name).set(elapsed)
+        log.info("startup_phase", phase=name, seconds=round(elapsed, 3))
+
+
+def ingress_frame(size):
+    INGRESS_FRAMES.inc()
+    INGRESS_BYTES.inc(size)
+
+
+def track_sessions(sessions):
+    """Export session count and queue depths of a SessionManager-like registry."""
+    SESSIONS.set_function(lambda: len(sessions))
+    QUEUE_DEPTH.labels("ingress_bytes").set_function(
+        lambda: sum(len(s.ingress) for s in sessions)
+    )
+    QUEUE_DEPTH.labels("egress_segments").set_function(
+        lambda: sum(s.egress.pending for s in sessions)
+    )
+    QUEUE_DEPTH.labels("encode_jobs").set_function(
+        lambda: sum(s.jobs.pending for s in sessions)
+    )
+
+
+async def monitor_event_loop_lag(interval=0.25):
+    # Run as a background task; a blocked loop shows up as oversleeping
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
+
+
+def render():
+    # Body and content type for a /metrics response
+    return generate_latest(), CONTENT_TYPE_LATEST
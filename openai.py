@@ -1,19 +1,96 @@
+import asyncio
+import collections
 import json
 import os
+import time
 import websockets
 
-# WebSocket URL for connecting to OpenAI's realtime API
-url = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01"
+import metrics
+from chat import modalities
+from codec import append_message, parse_server_event
+from dsp import input_audio_format
+from knowledge import TOOL, get_knowledge_base
+from logs import get_logger
+from transcripts import transcripts_enabled
+from wake import wake_gate_enabled
+
+log = get_logger("openai")
+
+
+def realtime_url():
+    # WebSocket URL for connecting to OpenAI's realtime API (overridable for local stand-ins)
+    return os.getenv(
+        "OPENAI_REALTIME_URL",
+        "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01",
+    )
+
+
+# Server VAD settings; the local VAD gate mirrors these
+TURN_DETECTION = {
+    "type": "server_vad",
+    "threshold": 0.3,
+    "prefix_padding_ms": 100,
+    "silence_duration_ms": 100
+}
+
+# Define the instructions for the AI's behavior during the session
+INSTRUCTIONS = '''
+    You are a helpful sales assistant that listens to a sales call and responds when it's appropriate.
+    The goal of the call may vary, it may be an intro call, it may be a call to discuss testing feedback, it may be to discuss pricing, etc.
+
+    You will provide suggestions to help the sales agent on the call.
+    You will only respond when the sales agent says "Hey Bot, can you help me?" Otherwise, you will remain silent.
+    Only speak in English.
+'''
+
+# Liveness monitoring and reconnects
+PING_INTERVAL = 10  # seconds between pings
+PING_TIMEOUT = 5  # seconds to wait for a pong before the socket is considered dead
+RECONNECT_ATTEMPTS = 5
+BACKLOG_BYTES = 24000 * 2 * 2  # wire audio kept while reconnecting (2s of 24 kHz PCM16, 12s of mu-law)
+
 
 class OpenAIRealtime:
     def __init__(self):
         # Initialize the WebSocket connection as None
         self.ws = None
+        self.turn_detection = dict(TURN_DETECTION)
+        if wake_gate_enabled():
+            # Responses are only requested after the wake phrase (see wake.py)
+            self.turn_detection["create_response"] = False
+        # Full session config; replayed with session.update after every reconnect
+        self.session = {
+            "modalities": modalities(),  # Text only when answers go to the chat (OUTPUT_MODE)
+            "instructions": INSTRUCTIONS,  # Provide the AI with specific instructions
+            "input_audio_format": input_audio_format(),  # What sessions.py sends (see dsp.IngressCodec)
+            "output_audio_format": "pcm16",  # 24 kHz PCM16, segmented and encoded by streaming.py
+            "turn_detection": self.turn_detection,  # Configure turn detection settings
+            "voice": "nova"  # Specify the voice to be used
+        }
+        if transcripts_enabled() or wake_gate_enabled():
+            # Transcribe what participants say, for the transcript store and the wake phrase
+            self.session["input_audio_transcription"] = {"model": "whisper-1"}
+        if get_knowledge_base() is not None:
+            # Let the model look up product docs and pricing (answered by knowledge.py)
+            self.session["tools"] = [TOOL]
+            self.session["tool_choice"] = "auto"
+        self.closing = False
+        self.reconnects = 0
+        self.on_reconnect = None  # called after a reconnect (fresh server-side conversation)
+        self.rtt = None  # last ping round trip in seconds
+        self._backlog = collections.deque()  # PCM that arrived while disconnected
+        self._backlog_bytes = 0
+        self._reconnect_lock = asyncio.Lock()
+        self._monitor_task = None
+
+    @property
+    def is_open(self):
+        return self.ws is not None and self.ws.open
 
     async def connect(self):
         # Establish a WebSocket connection with the necessary headers
         self.ws = await websockets.connect(
-            url,
+            realtime_url(),
             extra_headers={
                 "Authorization": f"Bearer {os.environ['OPENAI_API_KEY']}",  # Use API key from environment variables
                 "OpenAI-Beta": "realtime=v1",  # Specify the beta version for realtime
@@ -22,36 +99,90 @@ class OpenAIRealtime:
         # Update the session with specific instructions and settings
         await self.update_session()
 
-    async def update_session(self):
-        # Check if the WebSocket connection is open
+    async def close(self):
+        # Close the WebSocket connection if it is open; no reconnect after this
+        self.closing = True
+        if self._monitor_task:
+            self._monitor_task.cancel()
         if self.ws and self.ws.open:
-            # Define the instructions for the AI's behavior during the session
-            instructions = '''
-                You are a helpful sales assistant that listens to a sales call and responds when it's appropriate.
-                The goal of the call may vary, it may be an intro call, it may be a call to discuss testing feedback, it may be to discuss pricing, etc.
-
-                You will provide suggestions to help the sales agent on the call.
-                You will only respond when the sales agent says "Hey Bot, can you help me?" Otherwise, you will remain silent.
-                Only speak in English.
-            '''
+            await self.ws.close()
 
+    async def update_session(self, **changes):
+        # Check if the WebSocket connection is open
+        self.session.update(changes)
+        if self.ws and self.ws.open:
             # Send session update with modalities, instructions, and other settings
             await self.ws.send(json.dumps({
                 "type": "session.update",
-                "session": {
-                    "modalities": ["audio", "text"],  # Specify modalities for the session
-                    "instructions": instructions,  # Provide the AI with specific instructions
-                    "output_audio_format": "mp3",  # Set the output audio format
-                    "turn_detection": {  # Configure turn detection settings
-                        "type": "server_vad",
-                        "threshold": 0.3,
-                        "prefix_padding_ms": 100,
-                        "silence_duration_ms": 100
-                    },
-                    "voice": "nova"  # Specify the voice to be used
-                }
+                "session": self.session
             }))
 
+    async def reconnect(self):
+        # Reconnect after the socket died and replay the session config; True on success
+        dead = self.ws
+        async with self._reconnect_lock:
+            if self.closing:
+                return False
+            if self.ws is not dead and self.is_open:
+                return True  # Someone else already reconnected
+            for attempt in range(RECONNECT_ATTEMPTS):
+                try:
+                    await self.connect()
+                except (OSError, websockets.exceptions.WebSocketException) as e:
+                    log.warning("openai_reconnect_failed", attempt=attempt + 1, error=e)
+                    await asyncio.sleep(min(2 ** attempt * 0.25, 5))
+                    continue
+                self.reconnects += 1
+                metrics.OPENAI_RECONNECTS.inc()
+                log.info("openai_reconnected", reconnects=self.reconnects)
+                if dead is not None:
+                    asyncio.create_task(dead.close())  # Unblocks anyone still reading it
+                if self.on_reconnect is not None:
+                    self.on_reconnect()
+                await self._flush_backlog()
+                return True
+            return False
+
+    def start_monitor(self):
+        # Ping the socket periodically, record the RTT and reconnect if it stops answering
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def ping(self):
+        # Round trip time of one ping, or None if the socket is dead
+        if not self.is_open:
+            return None
+        try:
+            start = time.perf_counter()
+            pong = await self.ws.ping()
+            await asyncio.wait_for(pong, PING_TIMEOUT)
+        except (asyncio.TimeoutError, websockets.exceptions.WebSocketException):
+            return None
+        self.rtt = time.perf_counter() - start
+        metrics.OPENAI_RTT.observe(self.rtt)
+        return self.rtt
+
+    async def _monitor(self):
+        while not self.closing:
+            await asyncio.sleep(PING_INTERVAL)
+            if await self.ping() is None and not self.closing:
+                log.warning("openai_ping_timeout")
+                await self.reconnect()
+
+    async def _flush_backlog(self):
+        # Send the meeting audio buffered during the gap
+        while self._backlog and self.is_open:
+            pcm = self._backlog.popleft()
+            self._backlog_bytes -= len(pcm)
+            await self.ws.send(append_message(pcm))
+
+    def _buffer(self, pcm):
+        # Keep the most recent BACKLOG_BYTES of audio until the socket is back
+        self._backlog.append(bytes(pcm))
+        self._backlog_bytes += len(pcm)
+        while self._backlog_bytes > BACKLOG_BYTES:
+            self._backlog_bytes -= len(self._backlog.popleft())
+
     async def send_audio(self, audio_data):
         # Send audio data to the WebSocket if the connection is open
         if self.ws and self.ws.open:
@@ -61,7 +192,27 @@ class OpenAIRealtime:
                     "audio": audio_data  # Append audio data to the input buffer
                 }))
             except websockets.exceptions.WebSocketException as e:
-                print(f"Error sending audio: {e}")  # Handle WebSocket exceptions
+                log.error("openai_send_failed", message="input_audio_buffer.append", error=e)
+
+    async def send_audio_pcm(self, pcm):
+        # Send raw PCM16 using the prebuilt append message template;
+        # buffered while the connection is down so nothing is lost in the gap
+        if self.ws and self.ws.open and not self._reconnect_lock.locked():
+            try:
+                await self.ws.send(append_message(pcm))
+                return
+            except websockets.exceptions.WebSocketException as e:
+                log.error("openai_send_failed", message="input_audio_buffer.append", error=e)
+        if not self.closing:
+            self._buffer(pcm)
+
+    async def send_event(self, event):
+        # Send any client event (response.cancel, conversation.item.truncate, ...)
+        if self.ws and self.ws.open:
+            try:
+                await self.ws.send(json.dumps(event))
+            except websockets.exceptions.WebSocketException as e:
+                log.error("openai_send_failed", message=event.get("type"), error=e)
 
     async def send_response_create(self):
         # Request the creation of a response from the AI
@@ -69,19 +220,105 @@ class OpenAIRealtime:
             try:
                 await self.ws.send(json.dumps({"type": "response.create"}))
             except websockets.exceptions.WebSocketException as e:
-                print(f"Error sending response create: {e}")  # Handle WebSocket exceptions
+                log.error("openai_send_failed", message="response.create", error=e)
 
     async def receive_messages(self, message_handler=None):
-        # Continuously receive messages from the WebSocket
-        while True:
+        # Continuously receive messages from the WebSocket, reconnecting if it drops
+        while not self.closing:
+            ws = self.ws
+            try:
+                message = await ws.recv()  # Receive a message
+            except (websockets.exceptions.ConnectionClosed, OSError) as e:
+                if self.closing:
+                    break
+                log.warning("openai_closed", hint="reconnecting", error=repr(e))
+                if not await self.reconnect():
+                    log.error("openai_reconnect_gave_up", attempts=RECONNECT_ATTEMPTS)
+                    break
+                continue
+            parsed_message = {}
             try:
-                message = await self.ws.recv()  # Receive a message
-                parsed_message = json.loads(message)  # Parse the JSON message
-                
+                parsed_message = parse_server_event(message)  # Parse the JSON message (fast path for audio deltas)
+
                 if message_handler:
                     await message_handler(parsed_message)  # Handle the message with a custom handler if provided
                 else:
-                    print(parsed_message)  # Print the message if no handler is provided
-            except websockets.exceptions.ConnectionClosed:
-                print("Connection to OpenAI realtime WebSocket closed")  # Handle closed connection
-                break
+                    log.debug("openai_event", type=parsed_message.get("type"))
+            except Exception:
+                # A bug in one handler must not end the receive loop (or look like a dead socket)
+                log.exception("openai_event_failed", type=parsed_message.get("type"))
+
+
+class OpenAIRealtimePool:
+    """
+    Keeps OPENAI_POOL_SIZE realtime connections open, authenticated and
+    configured with session.update, so a new meeting gets one instantly
+    instead of waiting for the TLS handshake and session setup. Idle
+    connections are pinged and replaced when they die.
+    """
+
+    def __init__(self, size=None):
+        self.size = size if size is not None else int(os.getenv("OPENAI_POOL_SIZE", "2"))
+        self._idle = collections.deque()
+        self._filling = 0
+        self._tasks = set()
+        self._maintain_task = None
+
+    async def start(self):
+        # Warm the pool and keep it healthy in the background
+        await self._fill()
+        self._maintain_task = asyncio.create_task(self._maintain())
+
+    async def acquire(self):
+        # Hand out a warm connection (or open one if the pool is empty) and top the pool up
+        conn = None
+        while self._idle and conn is None:
+            candidate = self._idle.popleft()
+            if candidate.is_open:
+                conn = candidate
+        self._spawn(self._fill())
+        if conn is None:
+            conn = OpenAIRealtime()
+            await conn.connect()
+        conn.start_monitor()
+        return conn
+
+    async def close(self):
+        if self._maintain_task:
+            self._maintain_task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*(conn.close() for conn in self._idle), return_exceptions=True)
+        self._idle.clear()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _open_one(self):
+        conn = OpenAIRealtime()
+        try:
+            await conn.connect()
+        except (OSError, websockets.exceptions.WebSocketException) as e:
+            log.warning("openai_prewarm_failed", error=e)
+            return
+        finally:
+            self._filling -= 1
+        self._idle.append(conn)
+
+    async def _fill(self):
+        missing = self.size - len(self._idle) - self._filling
+        if missing > 0:
+            self._filling += missing
+            await asyncio.gather(*(self._open_one() for _ in range(missing)))
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            for conn in list(self._idle):
+                if await conn.ping() is None and conn in self._idle:
+                    log.info("openai_prewarmed_dropped")
+                    self._idle.remove(conn)
+                    asyncio.create_task(conn.close())
+            await self._fill()
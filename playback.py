@@ -0,0 +1,127 @@
+import asyncio
+import base64
+
+# Recall rejects output_audio payloads with a longer b64_data
+MAX_B64_CHARS = 1835008
+
+# MPEG audio Layer III tables, indexed by the header fields
+_BITRATES_KBPS = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),  # MPEG-2 and 2.5
+}
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),  # MPEG-2.5
+}
+
+
+def _skip_id3(data):
+    # Offset of the first audio frame after an ID3v2 tag, if any
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def mp3_frames(data):
+    """
+    Return (offset, length, seconds) for each MPEG Layer III frame in ``data``.
+
+    Parsing stops at the first byte that is not a frame header (e.g. a
+    trailing ID3v1 tag); the remaining bytes are not part of any frame.
+    """
+    frames = []
+    pos = _skip_id3(data)
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        if data[pos] != 0xFF or b1 & 0xE0 != 0xE0:
+            break
+        version = (b1 >> 3) & 3
+        layer = (b1 >> 1) & 3
+        bitrate_index = b2 >> 4
+        rate_index = (b2 >> 2) & 3
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            break  # Reserved, not Layer III, or free format
+        mpeg1 = version == 3
+        bitrate = _BITRATES_KBPS[1 if mpeg1 else 2][bitrate_index] * 1000
+        sample_rate = _SAMPLE_RATES[version][rate_index]
+        samples = 1152 if mpeg1 else 576
+        length = samples // 8 * bitrate // sample_rate + ((b2 >> 1) & 1)
+        frames.append((pos, length, samples / sample_rate))
+        pos += length
+    return frames
+
+
+def split_mp3(data, max_bytes):
+    """
+    Split MP3 bytes at frame boundaries into (chunk, seconds) pieces of at
+    most ``max_bytes`` each. Data that cannot be parsed is returned whole with
+    a duration of None.
+    """
+    frames = mp3_frames(data)
+    if not frames:
+        return [(data, None)]
+    chunks = []
+    start = 0  # Leading tag bytes ride along with the first chunk
+    seconds = 0.0
+    for offset, length, duration in frames:
+        end = offset + length
+        if end - start > max_bytes and offset > start:
+            chunks.append((data[start:offset], seconds))
+            start, seconds = offset, 0.0
+        seconds += duration
+    chunks.append((data[start:], seconds))
+    return chunks
+
+
+class PlaybackScheduler:
+    """
+    Per-bot, in-order playback through Recall's output_audio.
+
+    Audio is split into frame-aligned MP3 chunks under the payload limit, and
+    each POST is paced by the known duration of what is already playing: the
+    next chunk is uploaded one POST latency before the current one ends, so
+    playback is gapless and chunks never overlap.
+
+    ``post(mp3_b64)`` is awaited for each chunk; a None result is treated as a
+    failed upload that adds nothing to the playback timeline.
+    """
+
+    def __init__(self, post, max_b64_chars=MAX_B64_CHARS):
+        self.post = post
+        self.max_bytes = max_b64_chars // 4 * 3
+        self.upload_lead = 0.15  # Running average of the POST latency, seconds
+        self._play_until = 0.0  # Loop time at which the meeting stops hearing the bot
+        self._lock = asyncio.Lock()
+
+    @property
+    def queued_seconds(self):
+        # Audio already handed to Recall that has not been played yet
+        return max(0.0, self._play_until - asyncio.get_running_loop().time())
+
+    @property
+    def busy(self):
+        # A clip is being uploaded or waiting for its slot
+        return self._lock.locked()
+
+    def reset(self):
+        # Playback was stopped (barge-in): the next chunk starts right away
+        self._play_until = 0.0
+
+    async def play(self, mp3_b64):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            chunks = split_mp3(base64.b64decode(mp3_b64), self.max_bytes)
+            for chunk, seconds in chunks:
+                delay = self._play_until - self.upload_lead - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                payload = mp3_b64 if len(chunks) == 1 else base64.b64encode(chunk).decode("utf-8")
+                start = loop.time()
+                result = await self.post(payload)
+                end = loop.time()
+                self.upload_lead = 0.8 * self.upload_lead + 0.2 * (end - start)
+                if result is not None:
+                    self._play_until = max(end, self._play_until) + (seconds or 0.0)
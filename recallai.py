@@ -1,9 +1,88 @@
-import requests
+import asyncio
 import os
-import base64
-from dotenv import load_dotenv
+import random
 import time
 
+import httpx
+from dotenv import load_dotenv
+
+from assets import silence_b64
+from logs import get_logger
+from playback import MAX_B64_CHARS, PlaybackScheduler
+from speakers import raw_audio_config, realtime_events, routing_enabled
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+log = get_logger("recallai")
+
+# One keep-alive connection pool per process, shared by every bot
+_client = None
+
+# Bounded retries with full jitter
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.2  # seconds
+BACKOFF_MAX = 2.0  # seconds
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+def get_http_client():
+    # Create the shared client lazily so it binds to the running event loop
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def request(method, url, headers, json=None, timeout=None, idempotent=True):
+    """
+    Send a request through the shared pool, retrying transient failures.
+
+    Connection errors and 429s are always retried. Timeouts and 5xx responses
+    are only retried for idempotent calls, so a POST that may have reached
+    Recall (e.g. creating a bot) is never sent twice.
+    """
+    client = get_http_client()
+    for attempt in range(MAX_RETRIES + 1):
+        last = attempt == MAX_RETRIES
+        try:
+            response = await client.request(
+                method,
+                url,
+                headers=headers,
+                json=json,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+            if last:
+                raise
+        except httpx.TransportError:
+            if last or not idempotent:
+                raise
+        else:
+            retryable = response.status_code == 429 or (
+                idempotent and response.status_code in RETRY_STATUS
+            )
+            if last or not retryable:
+                return response
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+        await asyncio.sleep(delay)
+
 
 class RecallAI:
     def __init__(self):
@@ -16,7 +95,8 @@ class RecallAI:
             raise ValueError("RECALL_API_KEY environment variable is not set")
 
         # WEBHOOK_URL will be set later when the app starts
-        self.base_url = "https://us-west-2.recall.ai/api/v1/bot/"
+        api_base = os.getenv("RECALL_API_BASE", "https://us-west-2.recall.ai/api/v1")
+        self.base_url = f"{api_base}/bot/"
         self.headers = {
             "accept": "application/json",
             "content-type": "application/json",
@@ -24,8 +104,10 @@ class RecallAI:
         }
         self.id = None
 
-    def create(self, meeting_url, bot_name="Neil"):
-        # Create a bot and join it to a meeting
+    async def create(
+        self, meeting_url, bot_name="Neil", audio_path="/audio", timeout=30.0
+    ):
+        # Create a bot and join it to a meeting, streaming audio to audio_path
         webhook_url = os.getenv("WEBHOOK_URL")
         if not webhook_url:
             raise ValueError("WEBHOOK_URL environment variable is not set")
@@ -36,8 +118,8 @@ class RecallAI:
                 "realtime_endpoints": [
                     {
                         "type": "websocket",
-                        "url": f'wss://{webhook_url.split("//")[1]}/audio',
-                        "events": ["audio_mixed_raw.data"],
+                        "url": f'wss://{webhook_url.split("//")[1]}{audio_path}',
+                        "events": realtime_events(),
                     }
                 ]
             },
@@ -47,16 +129,23 @@ class RecallAI:
                 }
             },
         }
+        if routing_enabled():
+            # One audio stream per participant instead of the mix
+            payload["recording_config"][raw_audio_config()] = {}
 
-        print(f"Creating bot with payload: {payload}")
-        print(f"API URL: {self.base_url}")
-        print(f"Headers: {self.headers}")
+        log.info("bot_create", url=self.base_url, meeting_url=meeting_url, bot_name=bot_name)
 
-        response = requests.post(self.base_url, headers=self.headers, json=payload)
+        response = await request(
+            "POST",
+            self.base_url,
+            self.headers,
+            json=payload,
+            timeout=timeout,
+            idempotent=False,
+        )
 
-        print(f"Response status code: {response.status_code}")
-        print(f"Response headers: {response.headers}")
-        print(f"Response content: {response.text}")
+        log.info("bot_create_response", status=response.status_code)
+        log.debug("bot_create_body", body=response.text)
 
         if response.status_code != 200:
             raise Exception(
@@ -65,14 +154,10 @@ class RecallAI:
             )
 
         response_data = response.json()
-        print(f"Response data: {response_data}")
 
         # Check if 'id' field exists in the response
         if "id" not in response_data:
-            print(
-                f"Warning: 'id' field not found in response. "
-                f"Available fields: {list(response_data.keys())}"
-            )
+            log.warning("bot_create_no_id", fields=list(response_data.keys()))
             # Try alternative field names that might contain the bot ID
             if "bot_id" in response_data:
                 self.id = response_data["bot_id"]
@@ -93,66 +178,89 @@ class RecallAI:
 
         return self.id
 
-    def retrieve(self):
+    @staticmethod
+    def generate_silence(duration_ms=300):
+        # Short silent MP3 that enables automatic_audio_output for the bot;
+        # encoded once and then served from the asset cache
+        return silence_b64(duration_ms=duration_ms, sample_rate=16000)
+
+    async def retrieve(self, timeout=10.0):
         # Retrieve information about the bot
         url = self.base_url + self.id
-        response = requests.get(url, headers=self.headers)
+        response = await request("GET", url, self.headers, timeout=timeout)
         return response.json()
 
-    def get_meeting_participants(self):
+    async def get_meeting_participants(self):
         # Get the list of participants in the meeting
-        bot_response = self.retrieve()
+        bot_response = await self.retrieve()
         return bot_response["meeting_participants"]
 
-    def send_chat_message(self, message, to_speaker=None):
+    async def send_chat_message(self, message, to_speaker=None, timeout=10.0):
         # Send a chat message in the meeting
         url = self.base_url + self.id + "/send_chat_message"
         payload = {"message": message}
         if to_speaker:
             payload["to"] = to_speaker
-        response = requests.post(url, headers=self.headers, json=payload)
+        response = await request(
+            "POST", url, self.headers, json=payload, timeout=timeout, idempotent=False
+        )
         return response.json()
 
-    def output_audio(self, base64_audio):
-        # Output audio in the meeting
+    async def output_audio(self, base64_audio, timeout=10.0):
+        # Output audio in the meeting. Each POST starts playing at once, so an
+        # oversized MP3 is split at frame boundaries and its chunks are paced
+        # by their durations: each is posted just before the previous one ends
+        if len(base64_audio) > MAX_B64_CHARS:
+            log.info("output_audio_split", chars=len(base64_audio), max_chars=MAX_B64_CHARS)
+            results = []
+
+            async def post(chunk_b64):
+                result = await self._post_audio(chunk_b64, timeout)
+                results.append(result)
+                return result
+
+            await PlaybackScheduler(post=post).play(base64_audio)
+            return results[-1] if results else None
+        return await self._post_audio(base64_audio, timeout)
+
+    async def _post_audio(self, base64_audio, timeout):
         url = self.base_url + self.id + "/output_audio"
         payload = {"b64_data": base64_audio, "kind": "mp3"}
-        print(f"Sending request to {url}")
-        print(f"Payload size: {len(str(payload))} characters")
-
-        # Check if payload exceeds maximum allowed length
-        if len(payload["b64_data"]) > 1835008:
-            print(
-                "Warning: b64_data exceeds maximum allowed length of "
-                "1835008 characters"
-            )
-            print(f"Payload size: {len(payload['b64_data'])} characters")
-            payload["b64_data"] = payload["b64_data"][:1000000]
 
         try:
             start = time.time()
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = await request(
+                "POST",
+                url,
+                self.headers,
+                json=payload,
+                timeout=timeout,
+                idempotent=False,
+            )
             end = time.time()
-            print(f"Time taken to output audio: {end - start} seconds")
-            print(f"Response status code: {response.status_code}")
-            print(f"Response content: {response.text}")
+            log.debug(
+                "output_audio",
+                bot_id=self.id,
+                chars=len(base64_audio),
+                status=response.status_code,
+                seconds=round(end - start, 4),
+            )
             # Raise an exception for bad status codes
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error outputting audio: {e}")
-            response_text = response.text if "response" in locals() else "No response"
-            print(f"Response content: {response_text}")
+        except httpx.HTTPError as e:
+            response_text = response.text if "response" in locals() else None
+            log.error("output_audio_failed", bot_id=self.id, error=e, body=response_text)
             return None
 
-    def stop_audio(self):
+    async def stop_audio(self, timeout=5.0):
         # Stop audio output
         url = self.base_url + self.id + "/output_audio"
-        response = requests.delete(url, headers=self.headers)
+        response = await request("DELETE", url, self.headers, timeout=timeout)
         return response.text, response.status_code
 
-    def remove(self):
+    async def remove(self, timeout=10.0):
         # Remove the bot from the call
         url = self.base_url + self.id + "/leave_call"
-        response = requests.post(url, headers=self.headers)
+        response = await request("POST", url, self.headers, timeout=timeout)
         return response.json()
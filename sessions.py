@@ -0,0 +1,371 @@
+import asyncio
+import os
+import uuid
+
+from bargein import BargeInController
+from capture import CaptureWriter
+from chat import ChatRelay, audio_enabled, chat_enabled, chat_to
+from context import ContextCompactor, compaction_enabled
+from dsp import IngressCodec
+from openai import TURN_DETECTION, OpenAIRealtime
+from playback import PlaybackScheduler
+from speakers import ParticipantMap, SpeakerRouter, routing_enabled
+from ingress import IngressQueue
+from knowledge import KnowledgeTool
+from logs import get_logger
+from metrics import TurnTracer, ingress_frame
+from streaming import StreamingEgress
+from transcripts import get_transcript_store
+from vad import VoiceActivityGate, gate_enabled
+from wake import WakeGate, wake_gate_enabled
+from workers import get_workers
+
+log = get_logger("sessions")
+
+
+class SessionLimitError(Exception):
+    """Raised when the process is already serving its maximum number of meetings."""
+
+
+class MeetingSession:
+    """
+    Everything one bot needs in one meeting: its Recall handle, its own OpenAI
+    realtime connection and its own egress pipeline and audio buffers.
+
+    Recall streams meeting audio to a websocket path that carries ``token``,
+    which is known before the bot (and its id) exists. With a ``pool``, the
+    realtime connection is a pre-warmed one taken when the audio arrives.
+    With a ``filler`` (pre-encoded MP3, base64), the clip is played when a
+    response has started but its audio is more than FILLER_DELAY_MS away.
+    """
+
+    def __init__(self, recall, encode, pool=None, filler=None):
+        self.token = uuid.uuid4().hex
+        self.recall = recall
+        self.pool = pool
+        self.realtime = None
+        self.tracer = TurnTracer()
+        self._encode = encode
+        # Encodes run on the shared worker pool, a few at a time per meeting
+        self.jobs = get_workers().jobs()
+        self.egress = StreamingEgress(encode=self.encode_segment, send=self.send_segment)
+        # Paced, in-order uploads of the encoded segments
+        self.playback = PlaybackScheduler(post=self._post_audio)
+        # Stops playback as soon as someone starts talking over the bot
+        self.barge_in = BargeInController(
+            self.egress, stop_audio=self._stop_audio, send_event=self._send_event
+        )
+        # Drop silent meeting audio locally before it is sent (and billed)
+        self.vad = (
+            VoiceActivityGate.for_turn_detection(TURN_DETECTION)
+            if gate_enabled()
+            else None
+        )
+        # Decouples the Recall receive loop from the OpenAI socket
+        self.ingress = IngressQueue(send=self._send_upstream)
+        # Resamples (and optionally mu-law encodes) to the declared input_audio_format
+        self.wire = IngressCodec()
+        # Who is in the meeting, refetched at most once per PARTICIPANT_TTL
+        self.participants = ParticipantMap(fetch=self.recall.get_meeting_participants)
+        # Only allow-listed speakers' streams are sent on (SPEAKER_ALLOWLIST)
+        self.speakers = SpeakerRouter(self.participants) if routing_enabled() else None
+        self._receive_task = None
+        self._tasks = set()  # other background work, cancelled on close
+        self.filler = filler
+        # A filler clip only plays if the answer's audio is this late
+        self.filler_delay = int(os.getenv("FILLER_DELAY_MS", "600")) / 1000
+        # Answers knowledge-base tool calls, with a per-meeting cache (None without a KB)
+        self.knowledge = KnowledgeTool.for_meeting(send_event=self._send_event)
+        # What was said, for search after the meeting (None when disabled)
+        self.transcripts = get_transcript_store()
+        self._item_speakers = {}  # user item id -> who was speaking (with SPEAKER_ALLOWLIST)
+        # Binary record of ingress audio and server events for replay (CAPTURE_DIR)
+        self.capture = CaptureWriter.for_session(self.token)
+        # Answers streamed to the meeting chat as they are generated (OUTPUT_MODE)
+        self.chat = ChatRelay(send=self._send_chat) if chat_enabled() else None
+        # Answers are only requested once someone says the wake phrase (WAKE_GATE)
+        self.wake = WakeGate() if wake_gate_enabled() else None
+        # Old conversation items are folded into a summary in long meetings
+        self.context = (
+            ContextCompactor(send_event=self._send_event) if compaction_enabled() else None
+        )
+        self._awaiting_audio = False
+        self._filler_task = None
+
+    @property
+    def bot_id(self):
+        return self.recall.id
+
+    async def connect(self):
+        # Take a warm realtime connection (or open one) and start playing answers back
+        if self.realtime is None:
+            if self.pool is not None:
+                self.realtime = await self.pool.acquire()
+            else:
+                log.info("openai_connecting", bot_id=self.bot_id, pooled=False)
+                self.realtime = OpenAIRealtime()
+                await self.realtime.connect()
+                self.realtime.start_monitor()
+            if self.context is not None:
+                # Item ids from the old connection no longer exist after a reconnect
+                self.realtime.on_reconnect = self.context.reset
+        self.egress.start()
+        self.ingress.start()
+        if self._receive_task is None or self._receive_task.done():
+            self._receive_task = asyncio.create_task(
+                self.realtime.receive_messages(self.handle_message)
+            )
+            self._receive_task.add_done_callback(self._task_done)
+            if self.transcripts is not None:
+                self._spawn(self.record_participants())
+
+    def _spawn(self, coro):
+        # Run coro in the background until it finishes or the session closes
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task):
+        # Done callback: a background task's failure is logged, not left unretrieved
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("session_task_failed", bot_id=self.bot_id, error=repr(task.exception()))
+
+    async def record_participants(self):
+        # Attach the participant list to this meeting's transcript
+        try:
+            participants = await self.participants.get()
+        except Exception as e:
+            log.warning("participants_failed", bot_id=self.bot_id, error=e)
+            return
+        self.transcripts.add_meeting(self.bot_id, participants=participants)
+
+    def push_audio(self, pcm):
+        # Queue meeting PCM16 for OpenAI, skipping silence if the VAD gate is on
+        ingress_frame(len(pcm))
+        if self.capture is not None:
+            self.capture.ingress(pcm)
+        if self.vad is not None:
+            pcm = self.vad.process(pcm)
+        self.ingress.put(pcm)
+
+    def push_event(self, raw):
+        # A JSON event from Recall: per-speaker audio or a participant update
+        if self.speakers is not None:
+            pcm = self.speakers.observe(raw)
+            if pcm:
+                self.push_audio(pcm)
+
+    async def _send_upstream(self, pcm):
+        # Runs on the ingress sender task with coalesced frames
+        await self.realtime.send_audio_pcm(self.wire.encode(pcm))
+
+    async def _send_event(self, event):
+        await self.realtime.send_event(event)
+
+    async def handle_message(self, message):
+        """
+        Handle real-time messages from this session's OpenAI WebSocket.
+        """
+        log.debug("openai_event", bot_id=self.bot_id, type=message.get("type"))
+        if self.capture is not None:
+            self.capture.event(message)
+        if not self.barge_in.observe(message):
+            return  # Audio of an interrupted response
+        if self.wake is not None and self.wake.observe(message):
+            await self.realtime.send_response_create()
+        if self.context is not None and self.context.observe(message):
+            await self.context.compact()
+        if message.get("type") == "response.audio.delta":
+            content = message.get("delta", None)  # str of base64 audio data
+            if content is not None:
+                self._awaiting_audio = False
+                self.tracer.audio_delta()
+                self.egress.feed_b64(content)
+        elif message.get("type") == "response.audio_transcript.delta":
+            self.egress.transcript_delta(message.get("delta", ""))
+            if self.chat is not None:
+                self.chat.delta(message.get("delta", ""))
+        elif message.get("type") == "response.text.delta":
+            if self.chat is not None:
+                self.chat.delta(message.get("delta", ""))
+        elif message.get("type") == "response.audio.done":
+            self.tracer.audio_done()
+            self.egress.finish()
+        elif message.get("type") == "input_audio_buffer.speech_stopped":
+            self.tracer.speech_stopped()
+        elif message.get("type") == "input_audio_buffer.speech_started":
+            self._cancel_filler()  # No filler over someone talking
+            await self.barge_in.interrupt()
+        elif message.get("type") == "response.audio_transcript.done":
+            if self.chat is not None:
+                self.chat.finish()
+            if self.transcripts is not None:
+                self.transcripts.add_utterance(
+                    self.bot_id, "assistant", message.get("transcript", "")
+                )
+        elif message.get("type") == "response.text.done":
+            if self.chat is not None:
+                self.chat.finish()
+            if self.transcripts is not None:
+                self.transcripts.add_utterance(self.bot_id, "assistant", message.get("text", ""))
+        elif message.get("type") == "conversation.item.created":
+            item = message.get("item") or {}
+            if self.transcripts is not None and self.speakers is not None:
+                # The input buffer was just committed: its audio is the floor holder's
+                if item.get("role") == "user":
+                    self._item_speakers[item.get("id")] = self.speakers.speaker()
+        elif message.get("type") == "conversation.item.input_audio_transcription.completed":
+            speaker = self._item_speakers.pop(message.get("item_id"), None)
+            if self.transcripts is not None:
+                self.transcripts.add_utterance(
+                    self.bot_id, "user", message.get("transcript", ""), speaker=speaker
+                )
+        elif message.get("type") == "conversation.item.input_audio_transcription.failed":
+            self._item_speakers.pop(message.get("item_id"), None)
+        elif message.get("type") == "response.function_call_arguments.done":
+            if self.knowledge is not None:
+                await self.knowledge.handle(message)
+        elif message.get("type") in ("response.done", "response.cancelled"):
+            # A response can end without audio (tool call, text only, empty turn)
+            self._cancel_filler()
+            self.tracer.response_done(message)
+            if self.knowledge is not None:
+                await self.knowledge.response_done(message)
+        elif message.get("type") == "response.created":
+            self._awaiting_audio = True
+            if self.filler is not None and audio_enabled():
+                if self._filler_task is not None:
+                    self._filler_task.cancel()
+                self._filler_task = asyncio.create_task(self._play_filler())
+
+    def _cancel_filler(self):
+        self._awaiting_audio = False
+        if self._filler_task is not None:
+            self._filler_task.cancel()
+            self._filler_task = None
+
+    async def _play_filler(self):
+        # Hide model latency: fill the gap if the first audio delta is late
+        await asyncio.sleep(self.filler_delay)
+        if self._awaiting_audio:
+            self.egress.play(self.filler)
+
+    async def encode_segment(self, pcm):
+        # Encode one segment of the answer off the event loop, timed for /metrics
+        with self.tracer.encode():
+            return await self.jobs.run(self._encode, pcm)
+
+    async def send_segment(self, mp3_b64):
+        # Play one encoded segment in the meeting
+        log.debug("segment_send", bot_id=self.bot_id, chars=len(mp3_b64))
+        await self.playback.play(mp3_b64)
+
+    async def _post_audio(self, mp3_b64):
+        with self.tracer.recall_post():
+            result = await self.recall.output_audio(mp3_b64)
+        return result
+
+    async def _send_chat(self, text):
+        await self.recall.send_chat_message(text, to_speaker=chat_to())
+        self.tracer.chat_sent()
+
+    async def _stop_audio(self):
+        self.playback.reset()
+        await self.recall.stop_audio()
+
+    async def close(self):
+        # Stop background work, hang up on OpenAI and take the bot out of the call
+        log.info("ingress", bot_id=self.bot_id, **self.ingress.stats())
+        if self.vad is not None:
+            log.info("vad_gate", bot_id=self.bot_id, **self.vad.stats())
+        if self.wake is not None:
+            log.info("wake_gate", bot_id=self.bot_id, **self.wake.stats())
+        if self.context is not None:
+            log.info("context", bot_id=self.bot_id, **self.context.stats())
+        if self._filler_task is not None:
+            self._filler_task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        if self.chat is not None:
+            self.chat.close()
+        if self.speakers is not None:
+            self.speakers.close()
+        if self._receive_task:
+            self._receive_task.cancel()
+            try:
+                await self._receive_task
+            except asyncio.CancelledError:
+                pass
+        await self.ingress.close()
+        await self.egress.close()
+        if self.capture is not None:
+            self.capture.close()
+        if self.realtime is not None:
+            await self.realtime.close()
+        if self.bot_id:
+            try:
+                await self.recall.remove()
+            except Exception as e:
+                log.error("bot_remove_failed", bot_id=self.bot_id, error=e)
+
+
+class SessionManager:
+    """
+    Registry of live sessions keyed by bot id, with an admission limit per
+    process (MAX_SESSIONS, default 50).
+
+    Any object with ``bot_id``, ``token`` and an async ``close()`` can be
+    registered.
+    """
+
+    def __init__(self, max_sessions=None):
+        self.max_sessions = max_sessions or int(os.getenv("MAX_SESSIONS", "50"))
+        self._sessions = {}
+        self._tokens = {}
+        self._pending = 0  # admitted sessions still being created
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(list(self._sessions.values()))
+
+    async def open(self, factory):
+        """
+        Admit and register the session returned by ``await factory()``.
+
+        Raises SessionLimitError when the process is full.
+        """
+        if len(self._sessions) + self._pending >= self.max_sessions:
+            raise SessionLimitError(
+                f"Already serving {self.max_sessions} sessions in this process"
+            )
+        self._pending += 1
+        try:
+            session = await factory()
+        finally:
+            self._pending -= 1
+        self._sessions[session.bot_id] = session
+        self._tokens[session.token] = session
+        return session
+
+    def get(self, bot_id):
+        return self._sessions.get(bot_id)
+
+    def by_token(self, token):
+        return self._tokens.get(token)
+
+    async def close(self, bot_id):
+        # Tear one session down; safe to call more than once
+        session = self._sessions.pop(bot_id, None)
+        if session is None:
+            return
+        self._tokens.pop(session.token, None)
+        await session.close()
+
+    async def close_all(self):
+        await asyncio.gather(
+            *(self.close(bot_id) for bot_id in list(self._sessions)),
+            return_exceptions=True,
+        )
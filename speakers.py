@@ -0,0 +1,194 @@
+import asyncio
+import base64
+import os
+import time
+
+from codec import loads, recall_separate_audio
+from logs import get_logger
+from metrics import SPEAKER_BYTES
+
+log = get_logger("speakers")
+
+MIXED_AUDIO_EVENT = "audio_mixed_raw.data"
+SEPARATE_AUDIO_EVENT = "audio_separate_raw.data"
+PARTICIPANT_EVENTS = (
+    "participant_events.join",
+    "participant_events.leave",
+    "participant_events.update",
+)
+
+
+def speaker_allowlist():
+    # Names or participant ids whose audio is sent to OpenAI ("host" matches the
+    # meeting host). Empty: the bot subscribes to the mixed stream as before.
+    return [s.strip() for s in os.getenv("SPEAKER_ALLOWLIST", "").split(",") if s.strip()]
+
+
+def routing_enabled():
+    return bool(speaker_allowlist())
+
+
+def realtime_events():
+    # Recall realtime events a bot's websocket endpoint subscribes to
+    if routing_enabled():
+        return [SEPARATE_AUDIO_EVENT, *PARTICIPANT_EVENTS]
+    return [MIXED_AUDIO_EVENT]
+
+
+def raw_audio_config():
+    # recording_config key that turns on the matching raw audio stream
+    return "audio_separate_raw" if routing_enabled() else "audio_mixed_raw"
+
+
+class ParticipantMap:
+    """
+    Participants of one meeting by id. The full list is fetched (one GET of
+    the bot) at most once per ``ttl`` seconds, and participant join, leave
+    and update events keep it current in between.
+
+    ``fetch()`` is awaited for the list of participant dicts.
+    """
+
+    def __init__(self, fetch, ttl=None):
+        self.fetch = fetch
+        # How long the participant list from GET /bot/{id} is trusted without a refetch
+        self.ttl = ttl if ttl is not None else float(os.getenv("PARTICIPANT_TTL", "60"))
+        self.fetches = 0
+        self._participants = {}
+        self._fetched_at = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def stale(self):
+        return self._fetched_at is None or time.monotonic() - self._fetched_at > self.ttl
+
+    async def get(self):
+        # Current participant list; concurrent callers share one fetch
+        if self.stale:
+            async with self._lock:
+                if self.stale:
+                    participants = await self.fetch()
+                    self.fetches += 1
+                    self._participants = {p.get("id"): p for p in participants}
+                    self._fetched_at = time.monotonic()
+        return list(self._participants.values())
+
+    def lookup(self, participant_id):
+        return self._participants.get(participant_id)
+
+    def observe(self, event_name, participant):
+        # Apply a participant_events.* update without refetching
+        if event_name == "participant_events.leave":
+            self._participants.pop(participant.get("id"), None)
+        else:
+            known = self._participants.get(participant.get("id"), {})
+            self._participants[participant.get("id")] = {**known, **participant}
+
+
+class SpeakerRouter:
+    """
+    Picks the meeting audio that goes to OpenAI out of Recall's separate
+    per-participant streams: only allow-listed speakers are forwarded.
+
+    Allow-list decisions are made once per participant and cached. A speaker
+    the participant map does not know yet is decided from the bare audio
+    payload without caching, and the map is refetched in the background (at
+    most once per its ttl) so later frames see the name and host flag. When two
+    allow-listed speakers talk at once, the one already being forwarded
+    keeps the floor until ``floor_hold`` seconds after their last frame, so
+    two streams are never interleaved in one input buffer.
+    """
+
+    def __init__(self, participants, allow=None, floor_hold=0.5):
+        self.participants = participants
+        self.allow = {a.lower() for a in (speaker_allowlist() if allow is None else allow)}
+        self.floor_hold = floor_hold
+        self.forwarded = 0  # PCM16 bytes sent on to OpenAI
+        self.dropped = 0  # PCM16 bytes of other speakers
+        self._decisions = {}
+        self._names = {}  # participant id -> display name
+        self._refresh_task = None
+        self._floor = None
+        self._floor_at = 0.0
+
+    def allowed(self, participant):
+        pid = participant.get("id")
+        decision = self._decisions.get(pid)
+        if decision is None:
+            # Audio events can carry a bare id; the map has the rest
+            mapped = self.participants.lookup(pid)
+            known = {**(mapped or {}), **participant}
+            name = (known.get("name") or "").strip()
+            self._names[pid] = name or str(pid)
+            decision = (
+                str(pid).lower() in self.allow
+                or name.lower() in self.allow
+                or ("host" in self.allow and bool(known.get("is_host")))
+            )
+            if mapped is not None:
+                self._decisions[pid] = decision
+            else:
+                self._refresh()
+        return decision
+
+    def _refresh(self):
+        # Refetch the participant list for an unknown speaker; ParticipantMap.get()
+        # only goes to Recall when the list is older than its ttl
+        if not self.participants.stale:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.participants.get())
+            self._refresh_task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            log.error("participants_fetch_failed", error=repr(task.exception()))
+
+    def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+
+    def speaker(self):
+        # Name of whoever was forwarded last (the floor holder), or None
+        if self._floor is None:
+            return None
+        return self._names.get(self._floor, str(self._floor))
+
+    def observe(self, raw):
+        """
+        Handle one Recall realtime event (JSON text). Returns the PCM16 to
+        forward, or None for participant events and speakers that are not
+        forwarded.
+
+        Audio frames take the codec fast path: the base64 buffer is sliced
+        out unparsed and only decoded for a speaker that is forwarded. Only
+        participant and other control events are parsed in full.
+        """
+        audio = recall_separate_audio(raw)
+        if audio is None:
+            event = loads(raw)
+            name = event.get("event")
+            if name in PARTICIPANT_EVENTS:
+                participant = event.get("data", {}).get("data", {}).get("participant") or {}
+                self.participants.observe(name, participant)
+                # Name or host flag may have changed
+                self._decisions.pop(participant.get("id"), None)
+                self._names.pop(participant.get("id"), None)
+            return None
+        event, b64 = audio
+        participant = event.get("data", {}).get("data", {}).get("participant") or {}
+        now = time.monotonic()
+        pid = participant.get("id")
+        if not self.allowed(participant) or (
+            pid != self._floor and now - self._floor_at < self.floor_hold
+        ):
+            # Size of the PCM without decoding it
+            size = len(b64) // 4 * 3 - b64[-2:].count("=")
+            self.dropped += size
+            SPEAKER_BYTES.labels("dropped").inc(size)
+            return None
+        pcm = base64.b64decode(b64)
+        self._floor, self._floor_at = pid, now
+        self.forwarded += len(pcm)
+        SPEAKER_BYTES.labels("forwarded").inc(len(pcm))
+        return pcm
@@ -0,0 +1,272 @@
+import asyncio
+import inspect
+import time
+
+import numpy as np
+
+from audiobuffer import AudioBuffer
+from logs import get_logger
+
+log = get_logger("streaming")
+
+# The Realtime API streams assistant audio as 24 kHz mono PCM16 (little-endian)
+ASSISTANT_SAMPLE_RATE = 24000
+
+# Punctuation that ends a spoken sentence in the audio transcript
+SENTENCE_END = (".", "?", "!")
+
+
+class PCMSegmenter:
+    """
+    Cut a growing PCM16 stream into playable segments at natural pauses.
+
+    Audio is analysed in short windows. A segment is closed once it is long
+    enough and ends in a run of quiet windows; the pause needed is shorter
+    right after a sentence boundary and for the very first segment of a turn,
+    so the first words go out as early as possible. A segment that reaches
+    ``max_segment_ms`` without a pause is cut at its quietest window.
+
+    Segments are zero-copy ``memoryview`` slices of an ``AudioBuffer``.
+    """
+
+    def __init__(
+        self,
+        sample_rate=ASSISTANT_SAMPLE_RATE,
+        window_ms=10,
+        silence_threshold=400,
+        silence_ms=120,
+        sentence_silence_ms=30,
+        first_segment_ms=250,
+        min_segment_ms=800,
+        max_segment_ms=4000,
+    ):
+        self.sample_rate = sample_rate
+        self.window_bytes = sample_rate * window_ms // 1000 * 2
+        self.window_ms = window_ms
+        self.silence_threshold = silence_threshold
+        self.silence_windows = max(1, silence_ms // window_ms)
+        self.sentence_silence_windows = max(1, sentence_silence_ms // window_ms)
+        self.first_segment_windows = first_segment_ms // window_ms
+        self.min_segment_windows = min_segment_ms // window_ms
+        self.max_segment_windows = max_segment_ms // window_ms
+        self._buffer = AudioBuffer(capacity=sample_rate * 2)
+        self.reset()
+
+    @property
+    def dropped(self):
+        # Bytes discarded because a response overflowed the buffer
+        return self._buffer.dropped
+
+    def reset(self):
+        # Start a new assistant turn
+        self._buffer.clear()
+        self._energies = []  # RMS of each complete unread window
+        self._quiet_run = 0
+        self._sentence_ended = False
+        self._segments_emitted = 0
+
+    def mark_sentence_end(self):
+        # The transcript just closed a sentence; cut at the next short pause
+        self._sentence_ended = True
+
+    def push(self, pcm):
+        """Append PCM16 bytes and return the list of segments completed by them."""
+        self._buffer.append(pcm)
+        return self._scan()
+
+    def push_b64(self, b64_pcm):
+        """Decode a base64 delta and append it to the buffer; see ``push``."""
+        self._buffer.append_b64(b64_pcm)
+        return self._scan()
+
+    def _scan(self):
+        segments = []
+        while len(self._energies) * self.window_bytes + self.window_bytes <= len(
+            self._buffer
+        ):
+            start = len(self._energies) * self.window_bytes
+            window = np.frombuffer(
+                self._buffer.view(start, start + self.window_bytes), dtype="<i2"
+            ).astype(np.float32)
+            rms = float(np.sqrt(np.mean(window * window)))
+            self._energies.append(rms)
+            self._quiet_run = self._quiet_run + 1 if rms < self.silence_threshold else 0
+
+            cut = self._cut_point()
+            if cut is not None:
+                segments.append(self._take(cut))
+        return segments
+
+    def flush(self):
+        """Return whatever is left at the end of the turn and reset."""
+        remainder = self._buffer.consume()
+        self.reset()
+        return remainder
+
+    def _cut_point(self):
+        # Number of windows to emit now, or None to keep accumulating
+        length = len(self._energies)
+        if self._segments_emitted == 0:
+            min_windows = self.first_segment_windows
+            needed = self.sentence_silence_windows
+        elif self._sentence_ended:
+            min_windows = self.min_segment_windows
+            needed = self.sentence_silence_windows
+        else:
+            min_windows = self.min_segment_windows
+            needed = self.silence_windows
+
+        if length >= min_windows and self._quiet_run >= needed:
+            return length
+        if length >= self.max_segment_windows:
+            # No pause found; cut at the quietest window of the second half
+            half = length // 2
+            tail = self._energies[half:]
+            return half + tail.index(min(tail)) + 1
+        return None
+
+    def _take(self, windows):
+        segment = self._buffer.consume(windows * self.window_bytes)
+        del self._energies[:windows]
+        self._quiet_run = 0
+        self._sentence_ended = False
+        self._segments_emitted += 1
+        return segment
+
+
+class StreamingEgress:
+    """
+    Encode and ship assistant audio segment by segment while the response is
+    still streaming in.
+
+    ``feed`` never blocks the caller: completed segments are queued and a
+    background task encodes each one with ``encode(pcm) -> mp3_b64`` and hands
+    it to ``send(mp3_b64)`` in order. ``encode`` and ``send`` may be plain
+    functions or coroutine functions (e.g. an encode on a worker pool). Already encoded audio (e.g. a cached filler clip) can
+    be queued with ``play`` and goes out in the same order, unencoded.
+
+    Sent audio is tracked so the playback position can be estimated, and
+    ``interrupt`` drops everything not yet sent when a participant barges in.
+    """
+
+    def __init__(self, encode, send, segmenter=None):
+        self.encode = encode
+        self.send = send
+        self.segmenter = segmenter or PCMSegmenter()
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._turn_started = None
+        self._sent_ms = 0.0  # response audio handed to Recall this turn
+        self._playback_started = None  # when the first segment of the turn was sent
+
+    @property
+    def pending(self):
+        # Segments (and end-of-turn markers) waiting to be encoded and sent
+        return self._queue.qsize()
+
+    def played_ms(self):
+        """
+        Estimate how much of this turn's response audio the meeting has heard:
+        playback runs in real time from the first send, and cannot get ahead
+        of what has been sent.
+        """
+        if self._playback_started is None:
+            return 0.0
+        elapsed_ms = (time.perf_counter() - self._playback_started) * 1000
+        return min(self._sent_ms, elapsed_ms)
+
+    @property
+    def speaking(self):
+        # A turn is streaming in, queued, or still playing in the meeting
+        return (
+            self._turn_started is not None
+            or self._queue.qsize() > 0
+            or self.played_ms() < self._sent_ms
+        )
+
+    def interrupt(self):
+        """
+        Drop queued segments, the partial segment and the in-flight encode or
+        send, and start over with an idle sender.
+        """
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self.segmenter.reset()
+        self._turn_started = None
+        self._sent_ms = 0.0
+        self._playback_started = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = asyncio.create_task(self._run())
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def feed(self, pcm):
+        # Called with decoded PCM16 for every response.audio.delta
+        self._enqueue(self.segmenter.push(pcm))
+
+    def feed_b64(self, b64_pcm):
+        # Called with the base64 payload of every response.audio.delta
+        self._enqueue(self.segmenter.push_b64(b64_pcm))
+
+    def _enqueue(self, segments):
+        if self._turn_started is None:
+            self._turn_started = time.time()
+            self._sent_ms = 0.0
+            self._playback_started = None
+        for segment in segments:
+            self._queue.put_nowait(segment)
+
+    def play(self, mp3_b64):
+        # Queue a pre-encoded clip behind whatever is already waiting
+        self._queue.put_nowait(mp3_b64)
+
+    def transcript_delta(self, text):
+        # Called for every response.audio_transcript.delta
+        if text and text.rstrip().endswith(SENTENCE_END):
+            self.segmenter.mark_sentence_end()
+
+    def finish(self):
+        # Called on response.audio.done: ship the tail and close the turn
+        remainder = self.segmenter.flush()
+        if remainder:
+            self._queue.put_nowait(remainder)
+        self._queue.put_nowait(None)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        first_sent = False
+        while True:
+            segment = await self._queue.get()
+            if segment is None:
+                # End of turn marker
+                self._turn_started = None
+                first_sent = False
+                continue
+            try:
+                mp3_b64 = segment if isinstance(segment, str) else self.encode(segment)
+                if inspect.isawaitable(mp3_b64):
+                    mp3_b64 = await mp3_b64
+                result = self.send(mp3_b64)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                log.error("segment_send_failed", error=e)
+                continue
+            if not isinstance(segment, str):
+                if self._playback_started is None:
+                    self._playback_started = time.perf_counter()
+                self._sent_ms += len(segment) / 2 / self.segmenter.sample_rate * 1000
+            if not first_sent and self._turn_started is not None:
+                first_sent = True
+                log.info("first_segment", seconds=round(time.time() - self._turn_started, 3))
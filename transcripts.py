@@ -0,0 +1,178 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from logs import get_logger
+
+log = get_logger("transcripts")
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS meetings (
+    bot_id TEXT PRIMARY KEY,
+    meeting_url TEXT,
+    started REAL,
+    participants TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS utterances USING fts5(
+    text,
+    bot_id UNINDEXED,
+    role UNINDEXED,
+    speaker UNINDEXED,
+    ts UNINDEXED,
+    tokenize='porter unicode61'
+);
+"""
+
+_store = None
+
+
+def transcript_db():
+    # SQLite file for transcripts, e.g. TRANSCRIPT_DB=transcripts.db. Empty (the
+    # default): no text is kept and participants' speech is not transcribed
+    return os.getenv("TRANSCRIPT_DB", "")
+
+
+def transcripts_enabled():
+    return bool(transcript_db())
+
+
+class TranscriptStore:
+    """
+    Append-only, full-text searchable store of what was said in meetings.
+
+    ``add_utterance`` and ``add_meeting`` only put a row on a queue, so they
+    are safe to call from the event loop on the audio path. A writer thread
+    group-commits whatever has arrived every ``commit_ms`` (or every
+    ``max_batch`` rows) in one transaction. Utterances live in an FTS5 table;
+    ``search`` ranks matches across all meetings with bm25.
+    """
+
+    def __init__(self, path=None, commit_ms=500, max_batch=500):
+        self.path = path or transcript_db()
+        self.commit_interval = commit_ms / 1000
+        self.max_batch = max_batch
+        self.rows_written = 0
+        self.commits = 0
+        self._queue = queue.SimpleQueue()
+        db = self._connect()
+        db.executescript(SCHEMA)
+        db.close()
+        self._writer = threading.Thread(target=self._write_loop, name="transcripts", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add_utterance(self, bot_id, role, text, speaker=None, ts=None):
+        # role is "user" (meeting audio) or "assistant" (the bot); speaker is
+        # the participant's name when per-speaker routing knows it
+        if text and text.strip():
+            self._queue.put(("utterance", (text.strip(), bot_id, role, speaker, ts or time.time())))
+
+    def add_meeting(self, bot_id, meeting_url=None, participants=None):
+        # Insert the meeting, or refresh its participant list
+        participants = json.dumps(participants) if participants is not None else None
+        self._queue.put(("meeting", (bot_id, meeting_url, time.time(), participants)))
+
+    def search(self, query, limit=20, bot_id=None):
+        """
+        Full-text search (FTS5 query syntax) over every stored meeting, best
+        matches first. Blocking; call it from a worker thread in async code.
+        """
+        sql = (
+            "SELECT bot_id, role, speaker, ts, text, "
+            "snippet(utterances, 0, '[', ']', '...', 12) FROM utterances "
+            "WHERE utterances MATCH ?"
+        )
+        args = [query]
+        if bot_id is not None:
+            sql += " AND bot_id = ?"
+            args.append(bot_id)
+        sql += " ORDER BY bm25(utterances) LIMIT ?"
+        args.append(limit)
+        db = self._connect()
+        try:
+            rows = db.execute(sql, args).fetchall()
+        finally:
+            db.close()
+        keys = ("bot_id", "role", "speaker", "ts", "text", "snippet")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self):
+        # Flush everything queued so far and stop the writer
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+
+    def _write_loop(self):
+        db = self._connect()
+        db.execute("PRAGMA synchronous=NORMAL")  # WAL + NORMAL: durable at checkpoints, cheap commits
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.commit_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [item for item in batch if item is not None]
+                # Drain anything queued behind the stop marker too
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        batch.append(item)
+            if batch:
+                self._commit(db, batch)
+        db.close()
+
+    def _commit(self, db, batch):
+        utterances = [row for kind, row in batch if kind == "utterance"]
+        meetings = [row for kind, row in batch if kind == "meeting"]
+        try:
+            with db:
+                if meetings:
+                    db.executemany(
+                        "INSERT INTO meetings (bot_id, meeting_url, started, participants) "
+                        "VALUES (?, ?, ?, ?) ON CONFLICT(bot_id) DO UPDATE SET "
+                        "meeting_url = coalesce(excluded.meeting_url, meeting_url), "
+                        "participants = coalesce(excluded.participants, participants)",
+                        meetings,
+                    )
+                if utterances:
+                    db.executemany(
+                        "INSERT INTO utterances (text, bot_id, role, speaker, ts) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        utterances,
+                    )
+        except sqlite3.Error as e:
+            log.error("transcript_write_failed", rows=len(batch), error=e)
+            return
+        self.rows_written += len(batch)
+        self.commits += 1
+
+
+def get_transcript_store():
+    # One store (and writer thread) per process; None when transcripts are off
+    global _store
+    if _store is None and transcripts_enabled():
+        _store = TranscriptStore()
+    return _store
+
+
+def close_transcript_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,116 @@
+import collections
+import os
+
+import numpy as np
+
+# Recall delivers meeting audio as 16 kHz mono PCM16
+MEETING_SAMPLE_RATE = 16000
+
+
+class VoiceActivityGate:
+    """
+    Cheap local VAD in front of the OpenAI input audio buffer.
+
+    Each 20 ms frame is classified by RMS energy against an adaptive noise
+    floor, with the zero-crossing rate used to reject quiet broadband noise.
+    Only speech is forwarded, plus:
+
+    - ``prefix_padding_ms`` of audio preceding the speech onset, mirroring the
+      server VAD setting so it still sees the lead-in it expects, and
+    - a hangover after the last speech frame that is never shorter than the
+      server's ``silence_duration_ms`` (plus a margin), so the server still
+      hears enough silence to detect the end of the turn.
+
+    ``process`` returns the bytes to send upstream for each incoming chunk
+    (possibly empty). ``stats`` reports how much audio was suppressed.
+    """
+
+    def __init__(
+        self,
+        sample_rate=MEETING_SAMPLE_RATE,
+        frame_ms=20,
+        min_threshold=300.0,
+        speech_ratio=3.0,
+        zcr_max=0.35,
+        prefix_padding_ms=300,
+        hangover_ms=400,
+        silence_duration_ms=200,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.min_threshold = min_threshold
+        self.speech_ratio = speech_ratio
+        self.zcr_max = zcr_max
+        self.prefix_frames = max(1, -(-prefix_padding_ms // frame_ms))
+        self.hangover_frames = -(-max(hangover_ms, silence_duration_ms + 100) // frame_ms)
+        self.noise_floor = min_threshold / speech_ratio
+        self._partial = b""  # incomplete frame carried to the next chunk
+        self._prefix = collections.deque(maxlen=self.prefix_frames)
+        self._hangover = 0
+        self.forwarded_frames = 0
+        self.suppressed_frames = 0
+
+    @classmethod
+    def for_turn_detection(cls, turn_detection, **kwargs):
+        # Mirror the server VAD settings sent in session.update
+        return cls(
+            prefix_padding_ms=turn_detection.get("prefix_padding_ms", 300),
+            silence_duration_ms=turn_detection.get("silence_duration_ms", 200),
+            **kwargs,
+        )
+
+    def is_speech(self, frame):
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        signs = np.signbit(samples)
+        zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / len(samples)
+
+        threshold = max(self.min_threshold, self.noise_floor * self.speech_ratio)
+        speech = rms > 2 * threshold or (rms > threshold and zcr < self.zcr_max)
+        if not speech:
+            # Track the background level slowly while nobody is talking
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+    def process(self, pcm):
+        """Return the part of ``pcm`` (plus any padding) that should go upstream."""
+        data = self._partial + bytes(pcm)
+        whole = len(data) - len(data) % self.frame_bytes
+        self._partial = data[whole:]
+
+        out = []
+        for start in range(0, whole, self.frame_bytes):
+            frame = data[start : start + self.frame_bytes]
+            if self.is_speech(frame):
+                if self._hangover == 0 and self._prefix:
+                    # Speech onset: send the padding that preceded it
+                    self.forwarded_frames += len(self._prefix)
+                    self.suppressed_frames -= len(self._prefix)
+                    out.extend(self._prefix)
+                    self._prefix.clear()
+                self._hangover = self.hangover_frames
+            elif self._hangover > 0:
+                self._hangover -= 1
+            else:
+                self._prefix.append(frame)
+                self.suppressed_frames += 1
+                continue
+            out.append(frame)
+            self.forwarded_frames += 1
+        return b"".join(out)
+
+    def stats(self):
+        forwarded = self.forwarded_frames * self.frame_ms / 1000
+        suppressed = self.suppressed_frames * self.frame_ms / 1000
+        total = forwarded + suppressed
+        return {
+            "forwarded_seconds": forwarded,
+            "suppressed_seconds": suppressed,
+            "suppressed_ratio": suppressed / total if total else 0.0,
+        }
+
+
+def gate_enabled():
+    # VAD_GATE=0 forwards every frame, as before
+    return os.getenv("VAD_GATE", "1") != "0"
@@ -0,0 +1,123 @@
+import collections
+import difflib
+import os
+import re
+import time
+
+from metrics import WAKE_GATE_TURNS
+
+TRANSCRIPTION_DELTA = "conversation.item.input_audio_transcription.delta"
+TRANSCRIPTION_COMPLETED = "conversation.item.input_audio_transcription.completed"
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def wake_gate_enabled():
+    # WAKE_GATE=1: the model only answers after the wake phrase, matched locally
+    # against the input transcription (server VAD no longer creates responses)
+    return os.getenv("WAKE_GATE", "0") == "1"
+
+
+def words(text):
+    return _WORD.findall(text.lower())
+
+
+class WakeGate:
+    """
+    Decides which user turns get a response when server VAD's
+    ``create_response`` is off.
+
+    Input transcription (streamed deltas and completed items) is matched
+    against the wake phrase with a fuzzy ratio over runs of about as many
+    words as the phrase, within a sliding window of the last
+    ``window_s`` seconds, so "hey bought can you help me" or a phrase
+    split over two short turns still counts. ``observe(event)`` returns
+    True when the caller should send response.create.
+    """
+
+    def __init__(self, phrase=None, threshold=None, window_s=None):
+        if phrase is None:
+            phrase = os.getenv("WAKE_PHRASE", "Hey Bot, can you help me?")
+        if threshold is None:
+            # Similarity (0-1) a run of heard words needs to count as the phrase
+            threshold = float(os.getenv("WAKE_THRESHOLD", "0.8"))
+        if window_s is None:
+            # Words heard this recently may join up with the current turn's words
+            window_s = float(os.getenv("WAKE_WINDOW_S", "6"))
+        self.phrase = words(phrase)
+        self.threshold = threshold
+        self.window_s = window_s
+        self.triggered = 0
+        self.avoided = 0
+        self._matcher = difflib.SequenceMatcher(autojunk=False)
+        self._matcher.set_seq2(" ".join(self.phrase))  # seq2 is the side the matcher indexes
+        self._recent = collections.deque()  # (time, words) of completed turns
+        self._partial = {}  # item_id -> transcript so far
+        self._answered = set()  # item ids that already triggered a response
+
+    def score(self, heard, new=None):
+        """
+        Best similarity of the phrase to any run of len(phrase) +- 1 heard
+        words that ends in the last ``new`` words (all of them by default).
+        Runs that cannot reach the threshold are skipped on the cheap
+        upper bounds, so lower scores are approximate.
+        """
+        n = len(self.phrase)
+        new = len(heard) if new is None else new
+        best = 0.0
+        for size in (n - 1, n, n + 1):
+            first = max(0, len(heard) - new - size + 1)
+            for start in range(first, max(0, len(heard) - size) + 1):
+                run = heard[start : start + size]
+                if not run:
+                    continue
+                self._matcher.set_seq1(" ".join(run))
+                bound = max(best, self.threshold)
+                if self._matcher.real_quick_ratio() < bound or self._matcher.quick_ratio() < bound:
+                    continue
+                best = max(best, self._matcher.ratio())
+        return best
+
+    def _window(self, now, current):
+        while self._recent and now - self._recent[0][0] > self.window_s:
+            self._recent.popleft()
+        heard = [w for _, turn in self._recent for w in turn]
+        return heard + current
+
+    def _trigger(self, item_id):
+        self.triggered += 1
+        self._answered.add(item_id)
+        self._recent.clear()  # The same words must not wake the bot twice
+        WAKE_GATE_TURNS.labels("responded").inc()
+        return True
+
+    def observe(self, event):
+        kind = event.get("type")
+        if kind not in (TRANSCRIPTION_DELTA, TRANSCRIPTION_COMPLETED):
+            return False
+        item_id = event.get("item_id")
+        now = time.monotonic()
+        if kind == TRANSCRIPTION_DELTA:
+            if item_id in self._answered:
+                return False
+            text = self._partial.get(item_id, "") + event.get("delta", "")
+            self._partial[item_id] = text
+            current = words(text)
+            if self.score(self._window(now, current), len(current)) >= self.threshold:
+                return self._trigger(item_id)
+            return False
+        # Completed: the turn is final either way
+        self._partial.pop(item_id, None)
+        if item_id in self._answered:
+            self._answered.discard(item_id)
+            return False
+        heard = words(event.get("transcript", ""))
+        if self.score(self._window(now, heard), len(heard)) >= self.threshold:
+            return self._trigger(item_id)
+        self._recent.append((now, heard))
+        self.avoided += 1
+        WAKE_GATE_TURNS.labels("avoided").inc()
+        return False
+
+    def stats(self):
+        return {"wake_triggered": self.triggered, "wake_avoided": self.avoided}
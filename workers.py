@@ -0,0 +1,81 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+THREADS = "thread"
+PROCESSES = "process"
+
+_workers = None
+
+
+class AudioWorkers:
+    """
+    Executor for CPU-heavy audio work (resampling, MP3 encoding), shared by
+    every session in the process so the event loop only does I/O.
+
+    AUDIO_WORKER_KIND picks ``thread`` (default; numpy and LAME do their heavy
+    lifting in C) or ``process`` (full parallelism, jobs and arguments must be
+    picklable). AUDIO_WORKERS sets the pool size, default one per CPU.
+    """
+
+    def __init__(self, kind=None, max_workers=None):
+        self.kind = kind or os.getenv("AUDIO_WORKER_KIND", THREADS)
+        if max_workers is None:
+            max_workers = int(os.getenv("AUDIO_WORKERS", "0")) or os.cpu_count() or 1
+        self.max_workers = max_workers
+        if self.kind == THREADS:
+            self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="audio")
+        elif self.kind == PROCESSES:
+            self.executor = ProcessPoolExecutor(max_workers)
+        else:
+            raise ValueError(f"Unknown audio worker kind: {self.kind}")
+
+    def jobs(self, max_pending=None):
+        # A per-session handle with its own backpressure
+        return SessionJobs(self, max_pending)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SessionJobs:
+    """
+    One session's share of the worker pool: at most ``max_pending`` jobs
+    (AUDIO_JOBS_PER_SESSION, default 2) are queued or running at a time, and
+    ``run`` waits for a slot, so one busy meeting cannot flood the pool.
+    """
+
+    def __init__(self, workers, max_pending=None):
+        self.workers = workers
+        if max_pending is None:
+            max_pending = int(os.getenv("AUDIO_JOBS_PER_SESSION", "2"))
+        self._slots = asyncio.Semaphore(max_pending)
+        self.pending = 0  # jobs submitted or waiting for a slot
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` on the pool and return its result."""
+        if self.workers.kind == PROCESSES:
+            # Buffers handed out by AudioBuffer are memoryviews, which do not pickle
+            args = tuple(bytes(a) if isinstance(a, memoryview) else a for a in args)
+        self.pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.workers.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+
+def get_workers():
+    # One pool per process, created on first use
+    global _workers
+    if _workers is None:
+        _workers = AudioWorkers()
+    return _workers
+
+
+def shutdown_workers():
+    global _workers
+    if _workers is not None:
+        _workers.shutdown()
+        _workers = None